@@ -151,4 +151,9 @@ except PromptBuildError as e:
 The builder will replace these placeholders with their corresponding values during the build process.
 """
 
-from .builder import PromptBuilder, PromptBuildError
\ No newline at end of file
+from .builder import PromptBuilder, PromptBuildError
+from .state import BuilderState
+from .watcher import PromptWatcher
+from .loader import Loader
+from .pack import PackSource
+from .instrumentation import Instrumentation
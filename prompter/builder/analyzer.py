@@ -1,5 +1,6 @@
 
-from typing import List
+from bisect import bisect_right
+from typing import List, NamedTuple, Optional
 from dataclasses import dataclass
 import re
 from .loader import Loader
@@ -16,6 +17,37 @@ class Flag:
     line_number: int   # La ligne où le flag a été trouvé
     full_match: str    # Le flag complet (@__symbol__:beginning)
 
+
+class FlagSpan(NamedTuple):
+    """
+    Compact record of a flag found by `Analyzer.scan`, located by offsets.
+    - Example: `FlagSpan(start=0, end=22, name="symbol", var_name="beginning")`
+    """
+    start: int         # Position du début du flag dans le contenu
+    end: int           # Position de la fin du flag
+    name: str          # Le nom du flag (ex: "symbol")
+    var_name: str      # Le nom de la variable (ex: "beginning")
+
+    @property
+    def full_match(self) -> str:
+        """The complete flag (@__symbol__:beginning)"""
+        return f"@__{self.name}__:{self.var_name}"
+
+
+class LineIndex:
+    """Line numbers of offsets in a text, with line starts computed on first use"""
+
+    def __init__(self, content: str):
+        self.content = content
+        self._starts: Optional[List[int]] = None
+
+    def line_number(self, offset: int) -> int:
+        """Line (starting at 1) of the character at `offset`"""
+        if self._starts is None:
+            self._starts = [0]
+            self._starts.extend(m.end() for m in re.finditer("\n", self.content))
+        return bisect_right(self._starts, offset)
+
 class Analyzer:
     """Analyze prompt files to find flags
 
@@ -32,9 +64,25 @@ class Analyzer:
     """
 
     FLAG_PATTERN = r'@__(\w+)__:(\w+)'
+    FLAG_REGEX = re.compile(FLAG_PATTERN)
 
-    def __init__(self):
-        self.loader = Loader()
+    def __init__(self, loader: Optional[Loader] = None):
+        self.loader = loader or Loader()
+
+    def scan(self, content: str) -> List[FlagSpan]:
+        """
+        Find all flags in a text, in a single scan of the whole buffer
+
+        Args:
+            content: Content of a prompt file
+
+        Returns:
+            List[FlagSpan]: Offsets and names of the flags, in order
+        """
+        return [
+            FlagSpan(match.start(), match.end(), match.group(1), match.group(2))
+            for match in self.FLAG_REGEX.finditer(content)
+        ]
 
     def list_flags(self, path: str) -> List[Flag]:
         """
@@ -46,24 +94,20 @@ class Analyzer:
         Returns:
             List[Flag]: List of all flags found in the file
         """
-        flags = []
-        
         # Load file content
         content = self.loader.read_prompt(path)
         if content is None:
-            return flags
+            return []
             
-        # Parse content line by line to keep track of line numbers
-        for line_num, line in enumerate(content.splitlines(), 1):
-            # Find all matches in current line
-            matches = re.finditer(self.FLAG_PATTERN, line)
-            
-            for match in matches:
-                flags.append(Flag(
-                    name=match.group(1),       # First capture group (flag_name)
-                    var_name=match.group(2),   # Second capture group (var_name)
-                    line_number=line_num,
-                    full_match=match.group(0)  # Complete match
-                ))
-        
-        return flags
\ No newline at end of file
+        # Les numéros de ligne sont calculés à partir des positions
+        lines = LineIndex(content)
+        return [
+            Flag(
+                name=span.name,
+                var_name=span.var_name,
+                line_number=lines.line_number(span.start),
+                full_match=span.full_match
+            )
+            for span in self.scan(content)
+        ]
+            
\ No newline at end of file
@@ -0,0 +1,321 @@
+"""
+Benchmarks of the builder on synthetic template trees
+
+A synthetic tree is a `prompts/` directory and a `templates.yaml` generated
+from a `TreeSpec`: depth and fan-out of the symbol tree, size of the files,
+density of parameter flags and number of parameterized folders. Each tree is
+measured for startup, cold build, warm build and dependency analysis, and
+the percentiles are written as JSON to compare commits.
+
+### Example
+```bash
+# Mesurer et enregistrer la référence
+python -m prompter.builder.benchmark -o baseline.json
+
+# Après une modification, comparer à la référence
+python -m prompter.builder.benchmark -o current.json --compare baseline.json
+```
+"""
+
+import json
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+
+from .builder import PromptBuilder
+from .linker import Linker, TemplateManager
+from .loader import Loader
+from .state import BuilderState
+
+BENCHMARK_VERSION = 1
+
+_WORDS = (
+    "prompt template agent context answer question system user model "
+    "guideline example detail format output input language task"
+).split()
+
+
+@dataclass
+class TreeSpec:
+    """Shape of a synthetic template tree"""
+    depth: int = 4              # Niveaux de fichiers sous la racine
+    fanout: int = 4             # Symboles par fichier non terminal
+    file_size: int = 2000       # Texte littéral par fichier (caractères)
+    flag_density: float = 5.0   # Flags de paramètre pour 1000 caractères
+    params: int = 8             # Noms de paramètres distincts
+    variants: int = 0           # Dossiers du template paramétré (0: aucun)
+
+    @property
+    def build_params(self) -> Dict[str, str]:
+        """Parameters of a build of the root template"""
+        params = {f"p{i}": f"value {i}" for i in range(self.params)}
+        if self.variants:
+            params["variant"] = "v0"
+        return params
+
+
+PRESETS: Dict[str, TreeSpec] = {
+    "balanced": TreeSpec(depth=4, fanout=4),
+    "deep": TreeSpec(depth=12, fanout=1, file_size=1000),
+    "wide": TreeSpec(depth=2, fanout=32, file_size=500),
+    "folders": TreeSpec(depth=3, fanout=4, variants=16),
+}
+
+
+def generate_tree(directory: Path, spec: TreeSpec, seed: int = 0) -> Path:
+    """
+    Write a synthetic `prompts/` tree and its `templates.yaml` in `directory`
+
+    The root template is named "root".
+
+    Returns:
+        Path: Path of the generated `templates.yaml`
+    """
+    rng = random.Random(seed)
+    prompts = directory / "prompts"
+    templates = []
+
+    def text(size: int) -> str:
+        # Texte de remplissage avec des flags de paramètre répartis
+        words = []
+        length = 0
+        flags = max(0, round(size * spec.flag_density / 1000))
+        positions = set(rng.sample(range(max(1, size // 8)), min(flags, max(1, size // 8))))
+        while length < size:
+            if len(words) in positions and spec.params:
+                words.append(f"@__parameter__:p{rng.randrange(spec.params)}")
+            else:
+                words.append(rng.choice(_WORDS))
+            length += len(words[-1]) + 1
+        lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+        return "\n".join(lines) + "\n"
+
+    def write(relative: str, content: str) -> None:
+        path = prompts / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    # Arbre de symboles : chaque fichier non terminal référence `fanout` enfants
+    def node(level: int, index: int) -> str:
+        name = f"n{level}_{index}"
+        relative = f"level{level}/{name}.md"
+        templates.append({"flag_name": "symbol", "var_name": name, "template": relative})
+        body = text(spec.file_size)
+        if level < spec.depth:
+            for k in range(spec.fanout):
+                child = node(level + 1, index * spec.fanout + k)
+                body += f"@__symbol__:{child}\n"
+        write(relative, body)
+        return name
+
+    root_child = node(1, 0) if spec.depth else None
+    root_body = text(spec.file_size)
+    if root_child:
+        root_body += f"@__symbol__:{root_child}\n"
+
+    if spec.variants:
+        templates.append({
+            "flag_name": "symbol", "var_name": "variant_part",
+            "template": "variants/{variant}/part.md"
+        })
+        for v in range(spec.variants):
+            write(f"variants/v{v}/part.md", text(spec.file_size))
+        root_body += "@__symbol__:variant_part\n"
+
+    write("root.md", root_body)
+    templates.append({"flag_name": "symbol", "var_name": "root", "template": "root.md"})
+
+    config_path = directory / "templates.yaml"
+    config_path.write_text(yaml.safe_dump({"templates": templates}), encoding="utf-8")
+    return config_path
+
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    """Percentiles of timing samples, in microseconds"""
+    ordered = sorted(samples_ns)
+
+    def percentile(p: float) -> float:
+        # Rang le plus proche
+        rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+        return ordered[rank] / 1000
+
+    return {
+        "n": len(ordered),
+        "mean_us": sum(ordered) / len(ordered) / 1000,
+        "min_us": ordered[0] / 1000,
+        "p50_us": percentile(50),
+        "p90_us": percentile(90),
+        "p99_us": percentile(99),
+        "max_us": ordered[-1] / 1000,
+    }
+
+
+def _measure(fn: Callable[[], Any], repeat: int,
+             setup: Optional[Callable[[], Any]] = None) -> List[int]:
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter_ns()
+        fn() if setup is None else fn(arg)
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+def benchmark_tree(spec: TreeSpec, repeat: int = 200, cold_repeat: int = 20) -> Dict[str, Any]:
+    """
+    Measure a synthetic tree
+
+    - `startup`: builder state, YAML configuration and `PromptBuilder()`
+    - `cold_build`: first build with empty caches
+    - `warm_build`: build with warm caches, one parameter changing every time
+    - `analyze_dependencies`: dependency analysis of the root, files compiled
+
+    Returns:
+        Dict: Percentiles of every measure, and the size of the tree
+    """
+    with tempfile.TemporaryDirectory(prefix="prompter-bench-") as tmp:
+        config_path = generate_tree(Path(tmp), spec)
+        prompts = Path(tmp) / "prompts"
+        params = spec.build_params
+
+        def new_state() -> BuilderState:
+            return BuilderState(loader=Loader(root=prompts), config_path=config_path)
+
+        def startup() -> None:
+            state = new_state()
+            PromptBuilder(state=state)
+            state.linker
+
+        def cold_build(builder: PromptBuilder) -> None:
+            builder.build("root", **params)
+
+        warm = PromptBuilder(state=new_state())
+        warm.build("root", **params)
+        counter = iter(range(10 ** 9))
+
+        def warm_build() -> None:
+            warm.build("root", **{**params, "p0": next(counter)})
+
+        def fresh_linker() -> Linker:
+            # Fichiers déjà compilés : seule l'analyse du graphe est mesurée
+            return Linker(TemplateManager(warm.linker.template_manager.templates),
+                          compiler=warm.compiler)
+
+        results = {
+            "startup": summarize(_measure(startup, cold_repeat)),
+            "cold_build": summarize(_measure(
+                cold_build, cold_repeat, lambda: PromptBuilder(state=new_state())
+            )),
+            "warm_build": summarize(_measure(warm_build, repeat)),
+            "analyze_dependencies": summarize(_measure(
+                lambda linker: linker.analyze_dependencies("root.md"), repeat, fresh_linker
+            )),
+        }
+        files = sum(1 for p in prompts.rglob("*") if p.is_file())
+        size = len(warm.build("root", **params))
+
+    return {"spec": asdict(spec), "files": files, "prompt_chars": size, "results": results}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).parent, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(specs: Dict[str, TreeSpec], repeat: int = 200,
+                   cold_repeat: int = 20) -> Dict[str, Any]:
+    """Measure every tree, with the environment needed to compare runs"""
+    return {
+        "version": BENCHMARK_VERSION,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "trees": {
+            name: benchmark_tree(spec, repeat, cold_repeat)
+            for name, spec in specs.items()
+        },
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            stat: str = "p50_us") -> Dict[str, float]:
+    """
+    Ratio current / baseline of a statistic, for every measure of both runs
+
+    Example:
+        {"deep/warm_build": 1.04} means 4% slower than the baseline
+    """
+    ratios = {}
+    for tree, data in current["trees"].items():
+        base = baseline.get("trees", {}).get(tree)
+        if base is None:
+            continue
+        for name, stats in data["results"].items():
+            base_stats = base["results"].get(name)
+            if base_stats and base_stats[stat]:
+                ratios[f"{tree}/{name}"] = stats[stat] / base_stats[stat]
+    return ratios
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the builder on synthetic trees")
+    parser.add_argument("--preset", action="append", choices=sorted(PRESETS),
+                        help="Tree to measure, repeatable (default: all presets)")
+    parser.add_argument("--depth", type=int, help="Override the depth of the trees")
+    parser.add_argument("--fanout", type=int, help="Override the fan-out of the trees")
+    parser.add_argument("--file-size", type=int, help="Override the size of the files")
+    parser.add_argument("--flag-density", type=float, help="Override the parameter flags per 1000 chars")
+    parser.add_argument("--variants", type=int, help="Override the number of parameterized folders")
+    parser.add_argument("--repeat", type=int, default=200, help="Samples of warm measures")
+    parser.add_argument("--cold-repeat", type=int, default=20, help="Samples of cold measures")
+    parser.add_argument("-o", "--output", help="Write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with")
+    args = parser.parse_args()
+
+    overrides = {
+        key: value for key, value in (
+            ("depth", args.depth), ("fanout", args.fanout),
+            ("file_size", args.file_size), ("flag_density", args.flag_density),
+            ("variants", args.variants),
+        ) if value is not None
+    }
+    specs = {
+        name: TreeSpec(**{**asdict(PRESETS[name]), **overrides})
+        for name in (args.preset or sorted(PRESETS))
+    }
+
+    results = run_benchmarks(specs, args.repeat, args.cold_repeat)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    ratios = compare(baseline, results) if baseline else {}
+    for tree, data in results["trees"].items():
+        print(f"{tree}: {data['files']} files, {data['prompt_chars']} chars")
+        for name, stats in data["results"].items():
+            line = (
+                f"  {name:<22} p50 {stats['p50_us']:>10.1f}us  "
+                f"p90 {stats['p90_us']:>10.1f}us  p99 {stats['p99_us']:>10.1f}us"
+            )
+            ratio = ratios.get(f"{tree}/{name}")
+            if ratio is not None:
+                line += f"  x{ratio:.2f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,220 @@
-from typing import Dict, Any, Optional, List
-from .linker import Linker
-from .analyzer import Analyzer
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, Iterator, Optional, List, Set, Tuple, Union
+from .linker import Linker, path_params, reachable_paths
+from .analyzer import Analyzer, FlagSpan
+from .compiler import Compiler, CompiledTemplate, PARAMETER, TEXT
+from .state import BuilderState
 
 class PromptBuildError(Exception):
     """Custom error for prompt building failures"""
     pass
 
+@dataclass
+class RenderedSubtree:
+    """Rendered text of a subtree, with the compiled files it was built from"""
+    text: str
+    sources: Tuple[CompiledTemplate, ...]
+
+
+@dataclass
+class PrefixedPrompt:
+    """A rendered prompt with its parameter-independent prefix"""
+    text: str
+    prefix_length: int   # Nombre de caractères du préfixe
+    prefix_hash: str     # sha256 du préfixe encodé en UTF-8
+
+    @property
+    def prefix(self) -> str:
+        return self.text[:self.prefix_length]
+
+
+@dataclass
+class PinnedPrefix:
+    """Prefix of a template pinned by `build_prefixed(stable=True)`"""
+    length: int
+    hash: str
+    sources: Dict[str, CompiledTemplate]   # Fichiers figés du préfixe
+
+
+class _PinnedSnapshot(dict):
+    """Snapshot of a `build_prefixed(stable=True)` call, starting from the pinned files"""
+
+    def __init__(self, pinned: PinnedPrefix):
+        super().__init__(pinned.sources)
+        self.pinned = pinned
+
+
+def _flags(compiled: CompiledTemplate) -> Tuple[Tuple[str, str], ...]:
+    """The flags of a compiled file, in order"""
+    return tuple(
+        (segment.flag.name, segment.flag.var_name)
+        for segment in compiled.segments if segment.kind != TEXT
+    )
+
+
+def prefix_hash(prefix: str) -> str:
+    """Stable hash of a prompt prefix (sha256 of its UTF-8 encoding)"""
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SizeEstimate:
+    """Size of a rendered subtree, as computed by `PromptBuilder.estimate`"""
+    path: str             # Fichier racine du sous-arbre
+    chars: int            # Caractères du sous-arbre rendu (exact)
+    tokens: int           # Tokens estimés du sous-arbre rendu
+    literal_chars: int    # Texte littéral de ce fichier seul
+    parameter_chars: int  # Valeurs des paramètres de ce fichier seul
+    children: List["SizeEstimate"] = field(default_factory=list)
+
+    def walk(self) -> Iterator["SizeEstimate"]:
+        """This subtree and all its descendants, in document order"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+def approx_tokens(text: str) -> int:
+    """Rough token count of a text, about 4 characters per token"""
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class WarmupReport:
+    """What `PromptBuilder.warmup` loaded"""
+    files: int       # Fichiers lus et compilés
+    bytes: int       # Taille totale des fichiers (octets UTF-8)
+    seconds: float   # Durée du warm-up
+
+
+class BoundPrompt:
+    """A template rendered for fixed parameters, as returned by `PromptBuilder.bind`
+
+    Everything that depends only on the fixed parameters is already rendered;
+    `render()` only fills the remaining parameter slots. The text comes from
+    the prompt files at bind time: bind again after they change.
+    """
+
+    def __init__(self, template_name: str, fixed: Dict[str, Any],
+                 parts: List[Union[str, FlagSpan]]):
+        self.template_name = template_name
+        self.fixed = dict(fixed)
+        # Texte littéral fusionné, None aux emplacements des paramètres
+        self._parts: List[Optional[str]] = []
+        self._slots: List[Tuple[int, str]] = []
+        for part in parts:
+            if isinstance(part, str):
+                if self._parts and self._parts[-1] is not None:
+                    self._parts[-1] += part
+                else:
+                    self._parts.append(part)
+            else:
+                self._slots.append((len(self._parts), part.var_name))
+                self._parts.append(None)
+        self.parameters = frozenset(name for _, name in self._slots)
+        self._prefix_hash: Optional[str] = None
+
+    @property
+    def prefix_length(self) -> int:
+        """Length of the text rendered identically for any remaining parameters"""
+        if self._parts and self._parts[0] is not None:
+            return len(self._parts[0])
+        return 0
+
+    @property
+    def prefix_hash(self) -> str:
+        """Stable hash of the prefix, see `prefix_hash()`"""
+        if self._prefix_hash is None:
+            self._prefix_hash = prefix_hash(self._parts[0] if self.prefix_length else "")
+        return self._prefix_hash
+
+    def render(self, **kwargs) -> str:
+        """
+        Fill the remaining parameters
+
+        Raises:
+            PromptBuildError: If a remaining parameter is missing
+        """
+        missing = self.parameters.difference(kwargs)
+        if missing:
+            raise PromptBuildError(
+                f"Missing required parameters for template '{self.template_name}': {set(missing)}"
+            )
+        parts = self._parts.copy()
+        for i, name in self._slots:
+            parts[i] = str(kwargs[name])
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return (
+            f"BoundPrompt({self.template_name!r}, fixed={self.fixed}, "
+            f"parameters={set(self.parameters) or '{}'})"
+        )
+
+
+class SubtreeCache:
+    """LRU cache of rendered subtrees
+
+    Keys are `(resolved_path, values of the parameters read by the subtree)`,
+    so a subtree that reads no parameter is rendered once for every build.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, RenderedSubtree]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[RenderedSubtree]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple, entry: RenderedSubtree) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Tuple) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_paths(self, paths: Set[str]) -> int:
+        """Drop the subtrees rendered from any of `paths`, return how many were dropped"""
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if any(c.path in paths for c in entry.sources)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class PromptBuilder:
     """Builds complete prompts by recursively replacing flags
     ### Example
@@ -23,9 +232,48 @@ class PromptBuilder:
     ```
     """
     
-    def __init__(self):
-        self.analyzer = Analyzer()
-        self.linker = Linker()
+    def __init__(self, subtree_cache_size: Optional[int] = None,
+                 bundle: Optional[Union[str, Path]] = None,
+                 bundle_verify: str = "stat",
+                 state: Optional[BuilderState] = None):
+        """
+        Without arguments, the builder uses the process-wide `BuilderState`:
+        construction is nearly free and the caches are shared by every builder.
+        Passing `subtree_cache_size` or `bundle` creates a private state.
+
+        Args:
+            subtree_cache_size: Maximum number of rendered subtrees kept in cache
+            bundle: Bundle written by `compile_bundle`, to start without
+                parsing the YAML configuration nor opening prompt files
+            bundle_verify: How to detect a stale bundle ("stat", "content" or "none")
+            state: State to use instead of the process-wide one
+        """
+        if state is None:
+            if bundle is None and subtree_cache_size is None:
+                state = BuilderState.shared()
+            else:
+                state = BuilderState(
+                    BuilderState.DEFAULT_SUBTREE_CACHE_SIZE
+                    if subtree_cache_size is None else subtree_cache_size,
+                    bundle, bundle_verify
+                )
+        self.state = state
+
+    @property
+    def analyzer(self) -> Analyzer:
+        return self.state.analyzer
+
+    @property
+    def compiler(self) -> Compiler:
+        return self.state.compiler
+
+    @property
+    def linker(self) -> Linker:
+        return self.state.linker
+
+    @property
+    def subtree_cache(self) -> SubtreeCache:
+        return self.state.subtree_cache
     
     def build(self, template_name: str, **kwargs) -> str:
         """
@@ -41,103 +289,724 @@ class PromptBuilder:
         Raises:
             PromptBuildError: If a flag cannot be resolved or a parameter is missing
         """
+        template = self._prepare(template_name)
+        return self._build_prepared(template_name, template, kwargs, {})
+
+    def build_many(self, template_name: str,
+                   params_list: Iterable[Dict[str, Any]]) -> List[Union[str, PromptBuildError]]:
+        """
+        Build the same template for many parameter sets at once
+
+        The template is resolved once for the whole batch, every file is checked on disk at most once, and the
+        static subtrees are rendered once and shared by all the items.
+
+        Args:
+            template_name: Name of the template to build (e.g. "debug_prompt")
+            params_list: One dict of parameters per prompt to build
+
+        Returns:
+            List: One entry per parameter set, in order: the complete prompt,
+                or the `PromptBuildError` raised while building that item
+
+        Raises:
+            PromptBuildError: If the template itself cannot be found
+
+        Example:
+            >>> results = builder.build_many("debug_prompt", [
+            ...     {"debug_username": "golto"},
+            ...     {"debug_username": "tinia"},
+            ... ])
+        """
+        template = self._prepare(template_name)
+
+        # Fichiers compilés partagés par tout le lot
+        snapshot: Dict[str, Optional[CompiledTemplate]] = {}
+        results: List[Union[str, PromptBuildError]] = []
+        for params in params_list:
+            try:
+                results.append(
+                    self._build_prepared(template_name, template, params, snapshot)
+                )
+            except PromptBuildError as e:
+                results.append(e)
+        return results
+
+    def iter_build(self, template_name: str, **kwargs) -> Iterator[str]:
+        """
+        Build a prompt as a stream of text chunks, in document order
+
+        The prompt is never materialized as a whole, so chunks can be written
+        to a file or a socket as the template tree is walked.
+
+        Args:
+            template_name: Name of the template to build (e.g. "system-prompt")
+            **kwargs: Parameters required by the template (e.g. agent_name="tinia")
+
+        Yields:
+            str: Consecutive chunks of the prompt
+
+        Raises:
+            PromptBuildError: Same errors as `build()`, when the chunk that
+                cannot be built is reached
+
+        Example:
+            >>> with open("prompt.md", "w") as f:
+            ...     for chunk in builder.iter_build("debug_prompt", debug_username="golto"):
+            ...         f.write(chunk)
+        """
+        template = self._prepare(template_name)
+        snapshot: Dict[str, Optional[CompiledTemplate]] = {}
+        path = self._resolve_root(template_name, template, kwargs, snapshot)
+
+        try:
+            yield from self._iter_subtree(path, kwargs, [path], snapshot)
+        except PromptBuildError as e:
+            # Propager l'erreur en ajoutant le contexte
+            raise PromptBuildError(
+                f"Error building template '{template_name}': {str(e)}"
+            ) from e
+
+    async def build_async(self, template_name: str, **kwargs) -> str:
+        """
+        Build a complete prompt without blocking the event loop on file reads
+
+        Prompt files are read in the I/O threads of the builder state, the
+        sibling subtrees of a file being read concurrently. Concurrent builds
+        asking for the same file share a single read.
+
+        Args:
+            template_name: Name of the template to build (e.g. "system-prompt")
+            **kwargs: Parameters required by the template (e.g. agent_name="tinia")
+
+        Returns:
+            str: The complete prompt with all flags replaced
+
+        Raises:
+            PromptBuildError: Same errors as `build()`
+
+        Example:
+            >>> prompt = await builder.build_async("debug_prompt", debug_username="golto")
+        """
+        template = self._prepare(template_name)
+        loop = asyncio.get_running_loop()
+
+        if not self.linker.indexed:
+            # Premier build : l'index parcourt tout l'arbre sur le disque
+            await loop.run_in_executor(self.state.io_executor, self.linker.ensure_index)
+
+        snapshot: Dict[str, Optional[CompiledTemplate]] = {}
+        try:
+            root = template.format(**kwargs)
+        except KeyError:
+            # Paramètre de chemin manquant : signalé par _resolve_root
+            root = None
+        if root is not None:
+            await self._prefetch(root, kwargs, {root}, snapshot)
+
+        if all(path in self.linker.dependencies for path in snapshot):
+            # Tous les fichiers sont dans le snapshot : rendu sans I/O
+            return self._build_prepared(template_name, template, kwargs, snapshot)
+        # Dépendances pas encore analysées : l'analyse relit les fichiers
+        return await loop.run_in_executor(
+            self.state.io_executor,
+            self._build_prepared, template_name, template, kwargs, snapshot
+        )
+
+    async def _prefetch(self, path: str, params: Dict[str, Any], visited: Set[str],
+                        snapshot: Dict[str, Optional[CompiledTemplate]]) -> None:
+        """Compile the files of a subtree off the loop into `snapshot`, siblings concurrently"""
+        if path not in snapshot:
+            compiled = self.compiler.compiled.get(path)
+            if compiled is not None and not self.analyzer.loader.mutable:
+                # Source immuable : rien à relire
+                snapshot[path] = compiled
+            else:
+                future = self.compiler.compile_shared(path, self.state.io_executor)
+                snapshot[path] = await asyncio.wrap_future(future)
+        compiled = snapshot[path]
+        if compiled is None:
+            # Fichier manquant : l'erreur détaillée est levée au rendu
+            return
+
+        children = []
+        for flag in compiled.symbols:
+            template = self.linker.get_template_for_flag(flag)
+            if template is None:
+                continue
+            try:
+                child = template.format(**params)
+            except KeyError:
+                continue
+            if child not in visited:
+                visited.add(child)
+                children.append(self._prefetch(child, params, visited, snapshot))
+        await asyncio.gather(*children)
+
+    def estimate(self, template_name: str,
+                 token_counter: Optional[Callable[[str], int]] = None,
+                 **kwargs) -> SizeEstimate:
+        """
+        Compute the size of a prompt without rendering it
+
+        The literal text of every file is measured once and cached with its
+        compiled form; only the sizes of the parameter values are measured
+        per call. The character count is exact, the token count sums the
+        counter over the literal texts and the values, so it is an estimate.
+
+        Args:
+            template_name: Name of the template to build (e.g. "system-prompt")
+            token_counter: Counts the tokens of a text (default: `approx_tokens`).
+                Pass the same function on every call so literal counts stay cached
+            **kwargs: Parameters required by the template (e.g. agent_name="tinia")
+
+        Returns:
+            SizeEstimate: Size of the whole prompt, with one child per subtree
+
+        Raises:
+            PromptBuildError: Same errors as `build()`
+
+        Example:
+            >>> size = builder.estimate("debug_prompt", debug_username="golto")
+            >>> if size.tokens > budget:
+            ...     for subtree in size.walk():
+            ...         print(subtree.path, subtree.tokens)
+        """
+        template = self._prepare(template_name)
+        snapshot: Dict[str, Optional[CompiledTemplate]] = {}
+        path = self._resolve_root(template_name, template, kwargs, snapshot)
+
+        try:
+            return self._estimate(
+                path, kwargs, [path], token_counter or approx_tokens, {}, snapshot
+            )
+        except PromptBuildError as e:
+            # Propager l'erreur en ajoutant le contexte
+            raise PromptBuildError(
+                f"Error building template '{template_name}': {str(e)}"
+            ) from e
+
+    def _estimate(self, path: str, params: Dict[str, Any], build_stack: List[str],
+                  counter: Callable[[str], int], value_tokens: Dict[str, int],
+                  snapshot: Dict[str, Optional[CompiledTemplate]]) -> SizeEstimate:
+        """Size of the subtree rooted at `path`, walking the compiled segments only"""
+        compiled = self._load(path, build_stack, snapshot)
+        parameter_chars = 0
+        parameter_tokens = 0
+        children: List[SizeEstimate] = []
+
+        for segment in compiled.segments:
+            if segment.kind == PARAMETER:
+                value = self._parameter_value(segment.flag, compiled, params, build_stack)
+                name = segment.flag.var_name
+                if name not in value_tokens:
+                    value_tokens[name] = counter(value)
+                parameter_chars += len(value)
+                parameter_tokens += value_tokens[name]
+            elif segment.kind != TEXT:
+                resolved_path = self._resolve_symbol(segment.flag, compiled, params, build_stack)
+                children.append(self._estimate(
+                    resolved_path, params, build_stack + [resolved_path],
+                    counter, value_tokens, snapshot
+                ))
+
+        return SizeEstimate(
+            path=path,
+            chars=compiled.literal_chars + parameter_chars + sum(c.chars for c in children),
+            tokens=(compiled.literal_tokens(counter) + parameter_tokens
+                    + sum(c.tokens for c in children)),
+            literal_chars=compiled.literal_chars,
+            parameter_chars=parameter_chars,
+            children=children
+        )
+
+    def incremental(self, template_name: str) -> "IncrementalPrompt":
+        """
+        Get a handle rendering a template again and again, only re-rendering
+        the subtrees whose parameters changed since the previous call
+
+        Example:
+            >>> prompt = builder.incremental("debug_prompt")
+            >>> prompt.render(debug_username="golto").text
+            >>> prompt.render(debug_username="tinia").changes
+            [ChangedRange(old_start=85, old_end=90, start=85, end=90)]
+        """
+        # Import local : incremental.py dépend de ce module
+        from .incremental import IncrementalPrompt
+        return IncrementalPrompt(self, template_name)
+
+    def build_prefixed(self, template_name: str, stable: bool = False, **kwargs) -> PrefixedPrompt:
+        """
+        Build a prompt and report its longest prefix independent of the parameters
+
+        The prefix ends at the first parameter, or at the first file whose path
+        depends on a parameter. Prompts sharing a prefix hash start with the
+        same bytes, so downstream caches (ex: KV cache) can reuse that prefix.
+
+        Args:
+            template_name: Name of the template to build (e.g. "system-prompt")
+            stable: Pin the files of the prefix on the first call, so the
+                prefix stays byte-identical across calls even if these files
+                are edited, until `unpin_prefixes()`. If an edit changes the
+                flags of a pinned file, the prefix is pinned again
+            **kwargs: Parameters required by the template (e.g. agent_name="tinia")
+
+        Returns:
+            PrefixedPrompt: The prompt, the length of its prefix and its hash
+
+        Example:
+            >>> result = builder.build_prefixed("debug_prompt", debug_username="golto")
+            >>> cache.lookup(result.prefix_hash, result.prefix)
+        """
+        template = self._prepare(template_name)
+        pinned = self.state.pinned_prefixes.get(template) if stable else None
+        if pinned is not None and not self._pin_matches(pinned):
+            # Les fichiers figés n'ont plus les flags de ceux analysés par
+            # l'index : on fige à nouveau à partir des fichiers actuels
+            self.state.pinned_prefixes.pop(template, None)
+            pinned = None
+        snapshot: Dict[str, Optional[CompiledTemplate]] = _PinnedSnapshot(pinned) if pinned else {}
+
+        text = self._build_prepared(template_name, template, kwargs, snapshot)
+        if pinned is not None:
+            return PrefixedPrompt(text, pinned.length, pinned.hash)
+
+        out: List[str] = []
+        sources: List[CompiledTemplate] = []
+        if not path_params(template):
+            self._static_prefix(template, [template], out, sources, snapshot)
+        prefix = "".join(out)
+
+        if stable:
+            pinned = self.state.pinned_prefixes.setdefault(template, PinnedPrefix(
+                len(prefix), prefix_hash(prefix), {c.path: c for c in sources}
+            ))
+            return PrefixedPrompt(text, pinned.length, pinned.hash)
+        return PrefixedPrompt(text, len(prefix), prefix_hash(prefix))
+
+    def unpin_prefixes(self) -> None:
+        """Forget the prefixes pinned by `build_prefixed(stable=True)`"""
+        self.state.pinned_prefixes.clear()
+
+    def _pin_matches(self, pinned: PinnedPrefix) -> bool:
+        """Check that the pinned files still have the flags of the current files"""
+        for path, old in pinned.sources.items():
+            current = self.compiler.compile(path)
+            if current is None:
+                return False
+            if current is not old and _flags(current) != _flags(old):
+                return False
+        return True
+
+    def _static_prefix(self, path: str, build_stack: List[str], out: List[str],
+                       sources: List[CompiledTemplate],
+                       snapshot: Dict[str, Optional[CompiledTemplate]]) -> bool:
+        """
+        Render a subtree into `out` up to its first parameter-dependent segment
+
+        Returns:
+            bool: Whether the whole subtree is independent of the parameters
+        """
+        compiled = self._compile(path, snapshot)
+        if compiled is None:
+            return False
+        sources.append(compiled)
+
+        for segment in compiled.segments:
+            if segment.kind == TEXT:
+                out.append(segment.text)
+                continue
+            if segment.kind == PARAMETER:
+                return False
+
+            template = self.linker.get_template_for_flag(segment.flag)
+            if template is None or path_params(template) or template in build_stack:
+                return False
+            child_stack = build_stack + [template]
+            if not self.linker.subtree_params(template, {}):
+                # Sous-arbre sans paramètre : entièrement dans le préfixe
+                self._render_subtree(template, {}, child_stack, out, sources, snapshot)
+            elif not self._static_prefix(template, child_stack, out, sources, snapshot):
+                return False
+        return True
+
+    def bind(self, template_name: str, **fixed) -> BoundPrompt:
+        """
+        Render a template for fixed parameters, leaving the other parameters as slots
+
+        Path parameters (ex: `agent_name`) must be fixed: the tree is walked,
+        every path resolved and every part depending only on `fixed` rendered
+        once, so `render()` only fills the remaining slots.
+
+        Args:
+            template_name: Name of the template to bind (e.g. "system_prompt")
+            **fixed: Parameters known in advance (e.g. agent_name="tinia")
+
+        Returns:
+            BoundPrompt: The pre-rendered prompt
+
+        Raises:
+            PromptBuildError: If a path parameter is not fixed, or the tree
+                cannot be built
+
+        Example:
+            >>> prompt = builder.bind("system_prompt", agent_name="tinia")
+            >>> prompt.render(temp_debug="test")
+        """
+        template = self._prepare(template_name)
+        try:
+            path = template.format(**fixed)
+        except KeyError as e:
+            raise PromptBuildError(
+                f"Missing path parameter '{e.args[0]}' for template '{template_name}'"
+            )
+
+        parts: List[Union[str, FlagSpan]] = []
+        try:
+            self._bind_subtree(path, fixed, [path], parts, {})
+        except PromptBuildError as e:
+            # Propager l'erreur en ajoutant le contexte
+            raise PromptBuildError(
+                f"Error building template '{template_name}': {str(e)}"
+            ) from e
+        return BoundPrompt(template_name, fixed, parts)
+
+    def _bind_subtree(self, path: str, fixed: Dict[str, Any], build_stack: List[str],
+                      parts: List[Union[str, FlagSpan]],
+                      snapshot: Dict[str, Optional[CompiledTemplate]]) -> None:
+        """Render the parts of a subtree depending only on `fixed`, keep the other parameters as flags"""
+        key, _ = self._lookup_subtree(path, fixed, snapshot)
+        if key is not None:
+            # Le sous-arbre ne lit que des paramètres fixés
+            out: List[str] = []
+            self._render_subtree(path, fixed, build_stack, out, [], snapshot)
+            parts.extend(out)
+            return
+
+        compiled = self._load(path, build_stack, snapshot)
+        for segment in compiled.segments:
+            if segment.kind == TEXT:
+                parts.append(segment.text)
+            elif segment.kind == PARAMETER:
+                if segment.flag.var_name in fixed:
+                    parts.append(str(fixed[segment.flag.var_name]))
+                else:
+                    parts.append(segment.flag)
+            else:
+                resolved_path = self._resolve_symbol(segment.flag, compiled, fixed, build_stack)
+                self._bind_subtree(
+                    resolved_path, fixed, build_stack + [resolved_path], parts, snapshot
+                )
+
+    def warmup(self, max_workers: int = 8) -> WarmupReport:
+        """
+        Load and compile every prompt file reachable from the templates, in parallel
+
+        Parameterized templates are enumerated from the prompts directory, then
+        the dependency graph and its index are built, so the first builds read
+        no file. Builds still `stat` the files to detect changes, unless the
+        state was created with `revalidate=False` (see `BuilderState.revalidate`).
+
+        Args:
+            max_workers: Maximum number of threads reading files
+
+        Returns:
+            WarmupReport: Number of files, bytes loaded and duration
+
+        Example:
+            >>> report = builder.warmup()
+            >>> print(f"{report.files} files, {report.bytes} bytes in {report.seconds:.3f}s")
+        """
+        start = time.perf_counter()
+        paths = reachable_paths(self.analyzer.loader, self.linker.template_manager.templates)
+
+        with ThreadPoolExecutor(max_workers, thread_name_prefix="prompter-warmup") as pool:
+            compiled = [c for c in pool.map(self.compiler.compile, paths) if c is not None]
+
+        # Graphe des dépendances et index, à partir des fichiers compilés
+        for c in compiled:
+            self.linker.analyze_dependencies(c.path)
+        self.linker.ensure_index()
+
+        return WarmupReport(
+            files=len(compiled),
+            bytes=sum(len(c.source.encode("utf-8")) for c in compiled),
+            seconds=time.perf_counter() - start
+        )
+
+    def _prepare(self, template_name: str) -> str:
+        """Find the template of a name"""
         # Chercher le template initial dans le linker
         template = self.linker.template_manager.get_template("symbol", template_name)
         if not template:
             raise PromptBuildError(f"Template not found: {template_name}")
+        return template
             
-        # Analyser les dépendances pour vérifier les paramètres requis
-        dep = self.linker.analyze_dependencies(template)
+    def _resolve_root(self, template_name: str, template: str, params: Dict[str, Any],
+                      snapshot: Dict[str, Optional[CompiledTemplate]],
+                      retried: bool = False) -> str:
+        """
+        Check the parameters of a build and resolve the path of its root file
         
+        The graph index gives the required parameters of the whole tree
+        before any rendering, from a cache once the tree was seen. A missing
+        path parameter of the root falls back to the dependency analysis.
+        """
+        variant = self.linker.lookup(template, params)
+        if variant is not None:
+            missing_params = set(variant.required.difference(params))
+            if (missing_params or variant.error) and not retried:
+                stale = self._stale_paths(variant.sources, snapshot)
+                if stale:
+                    # L'index date d'avant une modification des fichiers : une
+                    # seule relance, le snapshot peut garder d'anciennes versions
+                    self._apply_changes(stale, snapshot)
+                    return self._resolve_root(template_name, template, params, snapshot, True)
+            error = variant.error
+        else:
+            missing_params = set(path_params(template)).difference(params)
+            if not missing_params:
+                # Analyser les dépendances pour vérifier les paramètres requis
+                dep = self.linker.analyze_dependencies(template.format(**params))
+                missing_params = set(dep.params.keys()) - set(params.keys())
+            error = None
+
         # Vérifier que tous les paramètres requis sont fournis
-        missing_params = set(dep.params.keys()) - set(kwargs.keys())
         if missing_params:
             raise PromptBuildError(
                 f"Missing required parameters for template '{template_name}': {missing_params}"
             )
+        if error is not None:
+            raise PromptBuildError(f"Error building template '{template_name}': {error}")
+
+        return template.format(**params)
+
+    def _build_prepared(self, template_name: str, template: str, params: Dict[str, Any],
+                        snapshot: Dict[str, Optional[CompiledTemplate]]) -> str:
+        """Check the parameters and render an already found template"""
+        instrumentation = self.state.instrumentation
+        start = time.perf_counter() if instrumentation is not None else 0.0
+        path = self._resolve_root(template_name, template, params, snapshot)
         
         try:
-            # Construire le prompt récursivement
-            return self._build_recursive(template, kwargs, [template])
+            # Construire le prompt en un seul passage sur les segments
+            out: List[str] = []
+            self._render_subtree(path, params, [path], out, [], snapshot)
+            text = "".join(out)
         except PromptBuildError as e:
             # Propager l'erreur en ajoutant le contexte
             raise PromptBuildError(
                 f"Error building template '{template_name}': {str(e)}"
             ) from e
+        if instrumentation is not None:
+            instrumentation.build(template_name, time.perf_counter() - start)
+        return text
     
-    def _build_recursive(self, path: str, params: Dict[str, Any], 
-                        build_stack: List[str]) -> str:
+    def _lookup_subtree(self, path: str, params: Dict[str, Any],
+                        snapshot: Dict[str, Optional[CompiledTemplate]]
+                        ) -> Tuple[Optional[Tuple], Optional[RenderedSubtree]]:
         """
-        Recursively build a prompt by replacing all flags
-        
+        Find the cache key of a subtree and its cached rendering, if still fresh
+
+        The cache key only holds the parameters the subtree actually reads
+        (see `Linker.subtree_params`), so static parts are rendered once.
+        """
+        required = self.linker.subtree_params(path, params)
+        try:
+            key = (path, tuple((name, str(params[name])) for name in sorted(required)))
+        except KeyError:
+            # Paramètre manquant : le rendu lèvera l'erreur détaillée
+            return None, None
+        if isinstance(snapshot, _PinnedSnapshot):
+            # Rendus des fichiers figés : séparés de ceux des fichiers actuels
+            key += ("pinned",)
+
+        entry = self.subtree_cache.get(key)
+        if entry is None or self._is_fresh_sources(entry.sources, snapshot):
+            return key, entry
+
+        # Un fichier a changé : ses dépendances ont pu changer aussi, seuls
+        # les fichiers modifiés et ceux qui en dépendent sont oubliés
+        self.subtree_cache.discard(key)
+        stale = self._stale_paths(entry.sources, snapshot)
+        if stale:
+            self._apply_changes(stale, snapshot)
+        return key, None
+
+    def _render_subtree(self, path: str, params: Dict[str, Any],
+                        build_stack: List[str], out: List[str],
+                        sources: List[CompiledTemplate],
+                        snapshot: Dict[str, Optional[CompiledTemplate]]) -> None:
+        """Render the subtree rooted at `path` into `out`, through the subtree cache"""
+        instrumentation = self.state.instrumentation
+        start = time.perf_counter() if instrumentation is not None else 0.0
+        key, entry = self._lookup_subtree(path, params, snapshot)
+        if entry is not None:
+            out.append(entry.text)
+            sources.extend(entry.sources)
+            if instrumentation is not None:
+                instrumentation.render(path, time.perf_counter() - start, len(build_stack), True)
+            return
+
+        sub_out: List[str] = []
+        sub_sources: List[CompiledTemplate] = []
+        self._render(path, params, build_stack, sub_out, sub_sources, snapshot)
+        text = "".join(sub_out)
+
+        if key is not None:
+            unique_sources = tuple({id(c): c for c in sub_sources}.values())
+            self.subtree_cache.put(key, RenderedSubtree(text, unique_sources))
+
+        out.append(text)
+        sources.extend(sub_sources)
+        if instrumentation is not None:
+            instrumentation.render(path, time.perf_counter() - start, len(build_stack), False)
+
+    def _iter_subtree(self, path: str, params: Dict[str, Any], build_stack: List[str],
+                      snapshot: Dict[str, Optional[CompiledTemplate]]) -> Iterator[str]:
+        """
+        Yield the chunks of the subtree rooted at `path` in document order
+
+        Cached subtrees are yielded in one chunk; other subtrees are streamed
+        without being materialized, and so are not added to the cache.
+        """
+        _, entry = self._lookup_subtree(path, params, snapshot)
+        if entry is not None:
+            yield entry.text
+            return
+
+        compiled = self._load(path, build_stack, snapshot)
+        for segment in compiled.segments:
+            if segment.kind == TEXT:
+                yield segment.text
+            elif segment.kind == PARAMETER:
+                yield self._parameter_value(segment.flag, compiled, params, build_stack)
+            else:
+                resolved_path = self._resolve_symbol(segment.flag, compiled, params, build_stack)
+                yield from self._iter_subtree(
+                    resolved_path, params, build_stack + [resolved_path], snapshot
+                )
+
+    def _is_fresh_sources(self, sources: Tuple[CompiledTemplate, ...],
+                          snapshot: Dict[str, Optional[CompiledTemplate]]) -> bool:
+        """Check that the compiled files are the ones of this build"""
+        if not self.analyzer.loader.mutable:
+            return True
+        return all(self._compile(c.path, snapshot) is c for c in sources)
+
+    def _stale_paths(self, sources: Tuple[CompiledTemplate, ...],
+                     snapshot: Dict[str, Optional[CompiledTemplate]]) -> Set[str]:
+        """Paths of the compiled files that have changed on disk (pinned files excluded)"""
+        if not self.analyzer.loader.mutable:
+            return set()
+        pinned = snapshot.pinned.sources if isinstance(snapshot, _PinnedSnapshot) else {}
+        return {
+            c.path for c in sources
+            if c.path not in pinned and self._compile(c.path, snapshot) is not c
+        }
+
+    def _apply_changes(self, stale: Set[str],
+                       snapshot: Dict[str, Optional[CompiledTemplate]]) -> None:
+        """Invalidate the changed files, keeping the versions this build already compiled"""
+        recompiled = {path: snapshot[path] for path in stale if snapshot.get(path) is not None}
+        self.state.apply_changes(stale, recompiled)
+
+    def _compile(self, path: str,
+                 snapshot: Dict[str, Optional[CompiledTemplate]]) -> Optional[CompiledTemplate]:
+        """Compile a file at most once per build (or per batch)"""
+        if path not in snapshot:
+            snapshot[path] = self.compiler.compile(path)
+        return snapshot[path]
+
+    def _load(self, path: str, build_stack: List[str],
+              snapshot: Dict[str, Optional[CompiledTemplate]]) -> CompiledTemplate:
+        """Get the compiled file of `path`, or raise if it doesn't exist"""
+        compiled = self._compile(path, snapshot)
+        if compiled is None:
+            build_path = " -> ".join(build_stack)
+            raise PromptBuildError(
+                f"File not found: {path}\n"
+                f"Build path: {build_path}"
+            )
+        return compiled
+
+    def _render(self, path: str, params: Dict[str, Any],
+                build_stack: List[str], out: List[str],
+                sources: List[CompiledTemplate],
+                snapshot: Dict[str, Optional[CompiledTemplate]]) -> None:
+        """
+        Render a compiled prompt file into `out`, recursing into symbols
+
         Args:
             path: Path to the current prompt file
             params: Parameters available for replacement
             build_stack: Stack of templates being processed (for error context)
-            
+            out: List of text chunks, joined once by the caller
+            sources: Compiled files rendered so far (to validate cached subtrees)
+            snapshot: Files already compiled during this build
+
         Raises:
             PromptBuildError: With detailed context if something goes wrong
         """
-        # Charger le contenu
-        content = self.analyzer.loader.read_prompt(path)
-        if content is None:
+        # Charger le fichier compilé
+        compiled = self._load(path, build_stack, snapshot)
+        sources.append(compiled)
+
+        # Parcourir les segments dans l'ordre du document
+        for segment in compiled.segments:
+            if segment.kind == TEXT:
+                out.append(segment.text)
+            elif segment.kind == PARAMETER:
+                out.append(self._parameter_value(segment.flag, compiled, params, build_stack))
+            else:
+                # Construction récursive
+                resolved_path = self._resolve_symbol(segment.flag, compiled, params, build_stack)
+                self._render_subtree(
+                    resolved_path, params, build_stack + [resolved_path], out, sources, snapshot
+                )
+
+    def _parameter_value(self, flag: FlagSpan, compiled: CompiledTemplate,
+                         params: Dict[str, Any], build_stack: List[str]) -> str:
+        """Get the text of a parameter flag"""
+        if flag.var_name not in params:
             build_path = " -> ".join(build_stack)
             raise PromptBuildError(
-                f"File not found: {path}\n"
+                f"Missing parameter '{flag.var_name}' "
+                f"at line {compiled.line_number(flag.start)} in {compiled.path}\n"
                 f"Build path: {build_path}"
             )
-        
-        # Trouver tous les flags
-        flags = self.analyzer.list_flags(path)
-        
-        # Remplacer chaque flag
-        for flag in flags:
-            if flag.name == "parameter":
-                # Flag de paramètre direct
-                if flag.var_name not in params:
-                    build_path = " -> ".join(build_stack)
-                    raise PromptBuildError(
-                        f"Missing parameter '{flag.var_name}' "
-                        f"at line {flag.line_number} in {path}\n"
-                        f"Build path: {build_path}"
-                    )
-                replacement = str(params[flag.var_name])
-            
-            else:
-                # Flag qui pointe vers un autre fichier
-                template = self.linker.get_template_for_flag(flag)
-                if template is None:
-                    build_path = " -> ".join(build_stack)
-                    raise PromptBuildError(
-                        f"Undefined flag '{flag.full_match}' "
-                        f"at line {flag.line_number} in {path}\n"
-                        f"Build path: {build_path}"
-                    )
-                
-                try:
-                    # Résoudre le template avec les paramètres
-                    resolved_path = template.format(**params)
-                except KeyError as e:
-                    build_path = " -> ".join(build_stack)
-                    raise PromptBuildError(
-                        f"Missing parameter '{e.args[0]}' for template '{template}' "
-                        f"at line {flag.line_number} in {path}\n"
-                        f"Build path: {build_path}"
-                    )
-                
-                # Éviter les boucles infinies
-                if resolved_path in build_stack:
-                    cycle = " -> ".join(build_stack[build_stack.index(resolved_path):])
-                    raise PromptBuildError(f"Circular dependency detected: {cycle}")
-                
-                # Construction récursive
-                replacement = self._build_recursive(
-                    resolved_path, 
-                    params,
-                    build_stack + [resolved_path]
-                )
-            
-            # Remplacer le flag dans le contenu
-            content = content.replace(flag.full_match, replacement)
-        
-        return content
\ No newline at end of file
+        return str(params[flag.var_name])
+
+    def _resolve_symbol(self, flag: FlagSpan, compiled: CompiledTemplate,
+                        params: Dict[str, Any], build_stack: List[str]) -> str:
+        """Get the path of the file a symbol flag points to, with parameters applied"""
+        # Flag qui pointe vers un autre fichier
+        template = self.linker.get_template_for_flag(flag)
+        if template is None:
+            build_path = " -> ".join(build_stack)
+            raise PromptBuildError(
+                f"Undefined flag '{flag.full_match}' "
+                f"at line {compiled.line_number(flag.start)} in {compiled.path}\n"
+                f"Build path: {build_path}"
+            )
+
+        instrumentation = self.state.instrumentation
+        start = time.perf_counter() if instrumentation is not None else 0.0
+        try:
+            # Résoudre le template avec les paramètres
+            resolved_path = template.format(**params)
+        except KeyError as e:
+            build_path = " -> ".join(build_stack)
+            raise PromptBuildError(
+                f"Missing parameter '{e.args[0]}' for template '{template}' "
+                f"at line {compiled.line_number(flag.start)} in {compiled.path}\n"
+                f"Build path: {build_path}"
+            )
+        if instrumentation is not None:
+            instrumentation.path_format(time.perf_counter() - start)
+
+        # Éviter les boucles infinies
+        if resolved_path in build_stack:
+            cycle = " -> ".join(build_stack[build_stack.index(resolved_path):])
+            raise PromptBuildError(f"Circular dependency detected: {cycle}")
+
+        return resolved_path
@@ -0,0 +1,236 @@
+"""
+Bulk build of one template for many parameter sets, in a process pool
+
+Parameter sets are streamed in chunks to worker processes, each holding a
+warmed `PromptBuilder`. Results come back in input order, with a bounded
+number of chunks in flight so memory stays flat on inputs of any size.
+
+### Example
+```py
+records = ({"debug_username": name} for name in names)
+for result in build_bulk("debug_prompt", records, workers=8):
+    if result.error is None:
+        write(result.prompt)
+```
+
+Or from the command line, with one JSON object of parameters per line:
+```bash
+python -m prompter.builder debug_prompt params.jsonl -o prompts.jsonl --errors errors.jsonl
+```
+"""
+
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .builder import PromptBuilder
+from .state import BuilderState
+
+
+class BulkResult(NamedTuple):
+    """Outcome of one parameter set"""
+    index: int              # Position dans l'entrée
+    prompt: Optional[str]   # Le prompt construit, ou None en cas d'erreur
+    error: Optional[str]    # Message d'erreur, ou None
+
+
+@dataclass
+class BulkReport:
+    """Summary of `run_bulk`"""
+    records: int
+    errors: int
+    seconds: float
+
+
+# Builder du processus worker, créé par _init_worker
+_worker_builder: Optional[PromptBuilder] = None
+
+
+def _make_builder(bundle: Optional[str]) -> PromptBuilder:
+    """Builder of a bulk job, the same in the workers and for the checks"""
+    # Les fichiers ne changent pas pendant un job : plus aucun stat par build
+    return PromptBuilder(state=BuilderState(bundle=bundle, revalidate=False))
+
+
+def _init_worker(bundle: Optional[str]) -> None:
+    global _worker_builder
+    _worker_builder = _make_builder(bundle)
+    _worker_builder.warmup()
+
+
+def _build_chunk(template_name: str, chunk: List[Tuple[int, Any]],
+                 raw: bool) -> List[BulkResult]:
+    """Build a chunk of records in a worker"""
+    results = []
+    records = []
+    for index, record in chunk:
+        if raw:
+            try:
+                record = json.loads(record)
+            except ValueError as e:
+                results.append(BulkResult(index, None, f"Invalid JSON: {e}"))
+                continue
+        if not isinstance(record, dict):
+            results.append(BulkResult(index, None, "Record is not a JSON object"))
+            continue
+        records.append((index, record))
+
+    built = _worker_builder.build_many(template_name, [r for _, r in records])
+    for (index, _), prompt in zip(records, built):
+        if isinstance(prompt, str):
+            results.append(BulkResult(index, prompt, None))
+        else:
+            results.append(BulkResult(index, None, str(prompt)))
+
+    results.sort(key=lambda r: r.index)
+    return results
+
+
+def _chunks(items: Iterable[Tuple[int, Any]], size: int) -> Iterator[List[Tuple[int, Any]]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _fan_out(template_name: str, items: Iterable[Tuple[int, Any]], raw: bool,
+             workers: Optional[int], chunk_size: int,
+             max_in_flight: Optional[int], bundle: Optional[Union[str, Path]]
+             ) -> Iterator[BulkResult]:
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    bundle = str(bundle) if bundle is not None else None
+
+    # Vérifier le template avant de lancer les workers, avec leur configuration
+    _make_builder(bundle)._prepare(template_name)
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(bundle,)) as pool:
+        pending: Deque = deque()
+        for chunk in _chunks(items, chunk_size):
+            pending.append(pool.submit(_build_chunk, template_name, chunk, raw))
+            if len(pending) >= max_in_flight:
+                # Attendre le plus ancien : ordre préservé, mémoire bornée
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def build_bulk(template_name: str, params_list: Iterable[Dict[str, Any]],
+               workers: Optional[int] = None, chunk_size: int = 256,
+               max_in_flight: Optional[int] = None,
+               bundle: Optional[Union[str, Path]] = None) -> Iterator[BulkResult]:
+    """
+    Build a template for a stream of parameter sets in a process pool
+
+    Args:
+        template_name: Name of the template to build (e.g. "debug_prompt")
+        params_list: Parameter sets, consumed lazily
+        workers: Number of worker processes (default: number of CPUs)
+        chunk_size: Parameter sets sent to a worker at once
+        max_in_flight: Maximum number of chunks submitted and not yet
+            yielded (default: twice the number of workers)
+        bundle: Bundle the workers start from (see `compile_bundle`)
+
+    Yields:
+        BulkResult: One result per parameter set, in input order
+
+    Raises:
+        PromptBuildError: If the template itself cannot be found
+        BundleError: If the bundle cannot be loaded (ex: `StaleBundleError`)
+    """
+    yield from _fan_out(
+        template_name, enumerate(params_list), False,
+        workers, chunk_size, max_in_flight, bundle
+    )
+
+
+def run_bulk(template_name: str, input_path: Union[str, Path],
+             output_path: Union[str, Path] = "-", errors_path: Union[str, Path] = "-",
+             workers: Optional[int] = None, chunk_size: int = 256,
+             max_in_flight: Optional[int] = None,
+             bundle: Optional[Union[str, Path]] = None) -> BulkReport:
+    """
+    Build a template for every line of a JSONL file of parameter sets
+
+    Every prompt is written to `output_path` as `{"line": n, "prompt": ...}`,
+    in input order; failures are written to `errors_path` as
+    `{"line": n, "error": ...}`. "-" means stdout (output) or stderr (errors).
+
+    Returns:
+        BulkReport: Number of records, of errors and duration
+    """
+    start = time.perf_counter()
+    records = errors = 0
+
+    with _open_out(output_path, sys.stdout) as out, \
+            _open_out(errors_path, sys.stderr) as err, \
+            open(input_path, encoding="utf-8") as f:
+        # Les lignes sont décodées par les workers
+        lines = ((n, line) for n, line in enumerate(f, 1) if line.strip())
+        results = _fan_out(template_name, lines, True, workers, chunk_size, max_in_flight, bundle)
+        for result in results:
+            records += 1
+            if result.error is None:
+                out.write(json.dumps({"line": result.index, "prompt": result.prompt},
+                                     ensure_ascii=False) + "\n")
+            else:
+                errors += 1
+                err.write(json.dumps({"line": result.index, "error": result.error},
+                                     ensure_ascii=False) + "\n")
+
+    return BulkReport(records, errors, time.perf_counter() - start)
+
+
+class _open_out:
+    """Open a file for writing, or use a standard stream for "-" """
+
+    def __init__(self, path: Union[str, Path], stream):
+        self.path = path
+        self.stream = stream
+        self.file = None
+
+    def __enter__(self):
+        if str(self.path) == "-":
+            return self.stream
+        self.file = open(self.path, "w", encoding="utf-8")
+        return self.file
+
+    def __exit__(self, *exc) -> None:
+        if self.file is not None:
+            self.file.close()
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m prompter.builder",
+        description="Build a template for every parameter set of a JSONL file"
+    )
+    parser.add_argument("template", help="Name of the template to build")
+    parser.add_argument("input", help="JSONL file, one JSON object of parameters per line")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output (default: stdout)")
+    parser.add_argument("--errors", default="-", help="JSONL error output (default: stderr)")
+    parser.add_argument("-j", "--workers", type=int, help="Worker processes (default: CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Records per task")
+    parser.add_argument("--bundle", help="Bundle the workers start from")
+    args = parser.parse_args()
+
+    report = run_bulk(
+        args.template, args.input, args.output, args.errors,
+        workers=args.workers, chunk_size=args.chunk_size, bundle=args.bundle
+    )
+    print(
+        f"{report.records} records, {report.errors} errors in {report.seconds:.2f}s",
+        file=sys.stderr
+    )
@@ -0,0 +1,206 @@
+"""
+Ahead-of-time compilation of the prompt tree into a single bundle file
+
+A bundle holds the template map of `config/templates.yaml`, every reachable
+prompt file already compiled, the dependency graph and its index of candidate files. `PromptBuilder` can
+start from a bundle without parsing YAML and without opening prompt files.
+
+### Example
+```py
+# Étape de build (une seule fois, ex: dans l'image Docker)
+compile_bundle("prompts.bundle")
+
+# Au démarrage de chaque worker
+builder = PromptBuilder(bundle="prompts.bundle")
+```
+
+Or from the command line:
+```bash
+python -m prompter.builder.bundle prompts.bundle
+```
+
+> **Note**: bundles are pickle files, only load bundles you built yourself.
+"""
+
+import hashlib
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .analyzer import Analyzer
+from .compiler import CompiledTemplate, Compiler
+from .linker import Dependency, GraphIndex, Linker, TemplateManager, reachable_paths
+from .loader import Loader
+from .template_loader import FlagTemplate, TemplateLoader
+
+BUNDLE_VERSION = 5
+
+
+class BundleError(Exception):
+    """Custom error for unreadable or incompatible bundles"""
+    pass
+
+
+class StaleBundleError(BundleError):
+    """The sources changed since the bundle was compiled"""
+    pass
+
+
+@dataclass
+class Bundle:
+    """Compiled prompt tree, as written by `compile_bundle`"""
+    version: int
+    fingerprint: str                     # sha256 du YAML et des fichiers
+    templates: List[FlagTemplate]
+    compiled: Dict[str, CompiledTemplate]
+    dependencies: Dict[str, Dependency]
+    config_signature: Tuple[int, int]    # (mtime_ns, size) du YAML
+    signatures: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # PromptSource.signature
+    index: Optional[GraphIndex] = None   # Fichiers candidats des templates paramétrés
+
+    def stale_sources(self, loader: Loader,
+                      config_path: Union[str, Path] = TemplateLoader.CONFIG_PATH) -> List[str]:
+        """List the sources whose signature differs from compile time"""
+        stale = []
+        if _signature(Path(config_path)) != self.config_signature:
+            stale.append(str(config_path))
+        for path, signature in self.signatures.items():
+            if loader.signature(path) != signature:
+                stale.append(path)
+        return stale
+
+    def seed(self, compiler: Compiler, linker: Linker) -> None:
+        """Fill the caches of a builder with the bundle content"""
+        loader = compiler.analyzer.loader
+        for path, compiled in self.compiled.items():
+            # Seule une source de type dossier a un FileCache à remplir
+            if loader.cache is not None and loader.prompts_dir is not None:
+                mtime_ns, size = self.signatures[path]
+                loader.cache.put(loader.get_prompt_path(path), compiled.source, mtime_ns, size)
+            compiler.compiled[path] = compiled
+        linker.dependencies.update(self.dependencies)
+        if self.index is not None:
+            linker.seed_index(self.index)
+
+
+def _signature(path: Path) -> Tuple[int, int]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return (-1, -1)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _fingerprint(config: bytes, sources: Dict[str, str]) -> str:
+    digest = hashlib.sha256(config)
+    for path in sorted(sources):
+        digest.update(b"\0" + path.encode("utf-8") + b"\0")
+        digest.update(sources[path].encode("utf-8"))
+    return digest.hexdigest()
+
+
+def compile_bundle(output_path: Union[str, Path], loader: Optional[Loader] = None,
+                   config_path: Optional[Union[str, Path]] = None) -> Bundle:
+    """
+    Compile `config/templates.yaml` and every reachable prompt file into a bundle
+
+    Args:
+        output_path: Path of the bundle file to write
+        loader: Loader of the prompt files (default: the `prompts` directory)
+        config_path: Template configuration (default: `config/templates.yaml`)
+
+    Returns:
+        Bundle: The bundle written to `output_path`
+    """
+    template_loader = TemplateLoader(config_path)
+    analyzer = Analyzer(loader)
+    compiler = Compiler(analyzer)
+    linker = Linker(TemplateManager(template_loader.templates), compiler=compiler)
+    loader = analyzer.loader
+
+    compiled = {}
+    signatures = {}
+    for path in reachable_paths(loader, template_loader.templates):
+        signatures[path] = loader.signature(path)
+        compiled[path] = compiler.compile(path)
+        linker.analyze_dependencies(path)
+
+    config = template_loader.config_path.read_bytes()
+    bundle = Bundle(
+        version=BUNDLE_VERSION,
+        fingerprint=_fingerprint(config, {p: c.source for p, c in compiled.items()}),
+        templates=template_loader.templates,
+        compiled=compiled,
+        dependencies=dict(linker.dependencies),
+        config_signature=_signature(template_loader.config_path),
+        signatures=signatures,
+        index=linker.index
+    )
+
+    with open(output_path, "wb") as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return bundle
+
+
+def load_bundle(path: Union[str, Path], verify: str = "stat", loader: Optional[Loader] = None,
+                config_path: Optional[Union[str, Path]] = None) -> Bundle:
+    """
+    Load a bundle written by `compile_bundle`
+
+    Args:
+        path: Path of the bundle file
+        verify: How to detect a stale bundle
+            - "stat": compare the signature of every source, ex: mtime and size (no file opened)
+            - "content": recompute the fingerprint from the sources on disk
+            - "none": trust the bundle (immutable deployments)
+        loader: Loader of the sources to check (default: the `prompts` directory)
+        config_path: Template configuration to check (default: `config/templates.yaml`)
+
+    Raises:
+        BundleError: If the file is not a bundle of this version
+        StaleBundleError: If the sources changed since compilation
+    """
+    with open(path, "rb") as f:
+        bundle = pickle.load(f)
+
+    if not isinstance(bundle, Bundle) or bundle.version != BUNDLE_VERSION:
+        raise BundleError(f"Not a prompt bundle of version {BUNDLE_VERSION}: {path}")
+
+    loader = loader or Loader()
+    config_path = Path(config_path) if config_path is not None else TemplateLoader.CONFIG_PATH
+    if verify == "stat":
+        stale = bundle.stale_sources(loader, config_path)
+        if stale:
+            raise StaleBundleError(f"Bundle {path} is stale, changed sources: {stale}")
+
+    elif verify == "content":
+        sources = {}
+        for p in reachable_paths(loader, bundle.templates):
+            sources[p] = loader.read_prompt(p)
+        config = config_path.read_bytes()
+        if _fingerprint(config, sources) != bundle.fingerprint:
+            raise StaleBundleError(f"Bundle {path} is stale, fingerprint mismatch")
+
+    elif verify != "none":
+        raise ValueError(f"Unknown verify mode: {verify}")
+
+    return bundle
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile the prompt tree into a bundle")
+    parser.add_argument("output", help="Path of the bundle file to write")
+    args = parser.parse_args()
+
+    bundle = compile_bundle(args.output)
+    print(f"{len(bundle.compiled)} prompt files compiled into {args.output}")
+
+
+if __name__ == "__main__":
+    # Passer par le module importé pour que le pickle référence
+    # prompter.builder.bundle et non __main__
+    from prompter.builder.bundle import main as _main
+    _main()
@@ -0,0 +1,180 @@
+import threading
+import time
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .analyzer import Analyzer, FlagSpan, LineIndex
+
+# Types de segments
+TEXT = "text"
+PARAMETER = "parameter"
+SYMBOL = "symbol"
+
+
+@dataclass(frozen=True)
+class Segment:
+    """
+    A piece of a compiled prompt file.
+    - `text`: literal text, copied as is
+    - `parameter`: slot filled with a build parameter (`@__parameter__:username`)
+    - `symbol`: slot filled with another prompt file (`@__symbol__:version`)
+    """
+    kind: str                        # "text", "parameter" ou "symbol"
+    text: str = ""                   # Le texte littéral (uniquement pour "text")
+    flag: Optional[FlagSpan] = None  # Le flag qui occupe le slot
+
+
+@dataclass
+class CompiledTemplate:
+    """A prompt file split into literal text and typed slots"""
+    path: str                 # Chemin relatif du fichier
+    source: str               # Contenu brut du fichier
+    segments: List[Segment] = field(default_factory=list)
+    _lines: Optional[LineIndex] = field(default=None, repr=False, compare=False)
+    _literal_chars: Optional[int] = field(default=None, repr=False, compare=False)
+    _token_counts: Dict[Any, int] = field(default_factory=dict, repr=False, compare=False)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Les compteurs de tokens sont des fonctions : pas dans le pickle
+        state = self.__dict__.copy()
+        state["_token_counts"] = {}
+        return state
+
+    @property
+    def literal_chars(self) -> int:
+        """Number of characters of literal text in this file, computed once"""
+        if self._literal_chars is None:
+            self._literal_chars = sum(len(s.text) for s in self.segments if s.kind == TEXT)
+        return self._literal_chars
+
+    def literal_tokens(self, counter: Callable[[str], int]) -> int:
+        """Tokens of the literal text in this file, counted once per counter"""
+        count = self._token_counts.get(counter)
+        if count is None:
+            if len(self._token_counts) >= 8:
+                # Compteurs créés à la volée : ne pas les accumuler
+                self._token_counts.clear()
+            count = sum(counter(s.text) for s in self.segments if s.kind == TEXT)
+            self._token_counts[counter] = count
+        return count
+
+    def line_number(self, offset: int) -> int:
+        """Line of an offset in the source, only computed for error messages"""
+        if self._lines is None:
+            self._lines = LineIndex(self.source)
+        return self._lines.line_number(offset)
+
+    @property
+    def symbols(self) -> List[FlagSpan]:
+        """Flags pointing to other prompt files"""
+        return [s.flag for s in self.segments if s.kind == SYMBOL]
+
+
+class Compiler:
+    """Compile prompt files once into a list of segments
+
+### Example
+    ```py
+    compiler = Compiler()
+    compiled = compiler.compile("debug/main.md")
+
+    for segment in compiled.segments:
+        if segment.kind == "text":
+            print(repr(segment.text))
+        else:
+            line = compiled.line_number(segment.flag.start)
+            print(f"Line {line}: {segment.flag.full_match}")
+    ```
+    """
+
+    def __init__(self, analyzer: Optional[Analyzer] = None):
+        self.analyzer = analyzer or Analyzer()
+        self.compiled: Dict[str, CompiledTemplate] = {}
+        self._lock = threading.Lock()
+        # Compilations en cours dans un executor, partagées entre appelants
+        self._inflight: Dict[str, Future] = {}
+        # Instrumentation optionnelle (voir instrumentation.py)
+        self.instrumentation = None
+
+    def compile(self, path: str) -> Optional[CompiledTemplate]:
+        """
+        Compile a prompt file, reusing the previous compilation while the
+        file is unchanged
+
+        Args:
+            path: Path relative to the prompts directory (ex: "agents/main.md")
+
+        Returns:
+            CompiledTemplate: The compiled file
+            None: If file doesn't exist
+        """
+        compiled = self.compiled.get(path)
+        if compiled is not None and not self.analyzer.loader.mutable:
+            return compiled
+
+        # Le cache du loader revalide le fichier avec un simple stat
+        content = self.analyzer.loader.read_prompt(path)
+        if content is None:
+            self.compiled.pop(path, None)
+            return None
+        if compiled is not None and compiled.source == content:
+            return compiled
+
+        compiled = self.compile_source(path, content)
+        with self._lock:
+            # Un autre thread a pu compiler le même contenu entre-temps :
+            # garder sa version pour que les caches voient un seul objet
+            current = self.compiled.get(path)
+            if current is not None and current.source == content:
+                return current
+            self.compiled[path] = compiled
+        return compiled
+
+    def compile_shared(self, path: str, executor: Executor) -> Future:
+        """
+        Compile a prompt file in `executor`, sharing the work with the
+        callers asking for the same file while it is in progress
+
+        Returns:
+            Future: Resolves to the result of `compile(path)`
+        """
+        with self._lock:
+            future = self._inflight.get(path)
+            if future is not None:
+                return future
+            future = executor.submit(self.compile, path)
+            self._inflight[path] = future
+
+        # Hors du verrou : le callback peut être appelé immédiatement
+        future.add_done_callback(lambda _: self._inflight.pop(path, None))
+        return future
+
+    def compile_source(self, path: str, content: str) -> CompiledTemplate:
+        """Split `content` into segments in a single scan of the whole text"""
+        instrumentation = self.instrumentation
+        start = time.perf_counter() if instrumentation is not None else 0.0
+        segments = []
+        last_end = 0
+
+        for span in self.analyzer.scan(content):
+            if span.start > last_end:
+                segments.append(Segment(TEXT, text=content[last_end:span.start]))
+
+            kind = PARAMETER if span.name == "parameter" else SYMBOL
+            segments.append(Segment(kind, flag=span))
+            last_end = span.end
+
+        if last_end < len(content):
+            segments.append(Segment(TEXT, text=content[last_end:]))
+
+        if instrumentation is not None:
+            instrumentation.scan(path, len(content), time.perf_counter() - start)
+        return CompiledTemplate(path=path, source=content, segments=segments)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Forget the compilation of `path`, or of every file if no path is given"""
+        if path is None:
+            self.compiled.clear()
+        else:
+            self.compiled.pop(path, None)
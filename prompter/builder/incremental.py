@@ -0,0 +1,210 @@
+"""
+Incremental rendering of a template whose parameters change between calls
+
+An `IncrementalPrompt` keeps the tree of the last rendering. On the next
+call, only the subtrees reading a changed parameter are rendered again and
+spliced into the previous text, and the changed ranges are reported so they
+can be forwarded as diffs.
+
+### Example
+```py
+prompt = builder.incremental("system_prompt")
+
+update = prompt.render(agent_name="tinia", temp_debug="hello")
+send_full(update.text)
+
+update = prompt.render(agent_name="tinia", temp_debug="hello again")
+data = update.text.encode("utf-8")
+for change in update.changes:
+    # Octets UTF-8 : old[old_start:old_end] devient new[start:end]
+    send_diff(change.old_start, change.old_end, data[change.start:change.end])
+```
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Union
+
+from .builder import PromptBuilder, PromptBuildError
+from .compiler import CompiledTemplate, PARAMETER, TEXT
+
+
+class ChangedRange(NamedTuple):
+    """A changed part of the prompt, in UTF-8 byte offsets
+
+    `old_text[old_start:old_end]` was replaced by `new_text[start:end]`.
+    """
+    old_start: int
+    old_end: int
+    start: int
+    end: int
+
+
+@dataclass
+class RenderUpdate:
+    """Result of `IncrementalPrompt.render`"""
+    text: str
+    changes: List[ChangedRange] = field(default_factory=list)
+
+
+class _Slot:
+    """Rendered value of a parameter flag"""
+    __slots__ = ("text", "size")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.size = len(text.encode("utf-8"))
+
+
+class _Node:
+    """Rendered subtree: one part per segment of its compiled file"""
+    __slots__ = ("path", "compiled", "params", "parts", "text", "size")
+
+    def __init__(self, path: str, compiled: CompiledTemplate, params: FrozenSet[str],
+                 parts: List[Union[_Slot, "_Node"]]):
+        self.path = path
+        self.compiled = compiled
+        self.params = params      # Paramètres lus par tout le sous-arbre
+        self.parts = parts
+        self.text = "".join(part.text for part in parts)
+        self.size = sum(part.size for part in parts)
+
+    def sources(self) -> List[CompiledTemplate]:
+        sources = [self.compiled]
+        for part in self.parts:
+            if isinstance(part, _Node):
+                sources.extend(part.sources())
+        return sources
+
+
+_MISSING = object()
+
+
+class IncrementalPrompt:
+    """Stateful rendering of one template, see `PromptBuilder.incremental`
+
+    A handle is not thread-safe: use one handle per conversation.
+    """
+
+    def __init__(self, builder: PromptBuilder, template_name: str):
+        self.builder = builder
+        self.template_name = template_name
+        self.template = builder._prepare(template_name)
+        self._root: Optional[_Node] = None
+        self._params: Dict[str, str] = {}
+
+    @property
+    def text(self) -> str:
+        """Text of the last rendering"""
+        return self._root.text if self._root is not None else ""
+
+    def render(self, **kwargs) -> RenderUpdate:
+        """
+        Render the template, reusing the subtrees whose parameters didn't change
+
+        Args:
+            **kwargs: Parameters required by the template (e.g. agent_name="tinia")
+
+        Returns:
+            RenderUpdate: The complete prompt and the changed byte ranges
+
+        Raises:
+            PromptBuildError: Same errors as `build()`; the previous rendering is kept
+        """
+        builder = self.builder
+        snapshot: Dict[str, Optional[CompiledTemplate]] = {}
+        path = builder._resolve_root(self.template_name, self.template, kwargs, snapshot)
+        params = {name: str(value) for name, value in kwargs.items()}
+
+        old = self._root
+        try:
+            if (old is None or old.path != path
+                    or not builder._is_fresh_sources(tuple(old.sources()), snapshot)):
+                # Premier rendu, autre fichier racine ou fichiers modifiés
+                root = self._render(path, params, [path], snapshot)
+                changes = [ChangedRange(0, old.size if old else 0, 0, root.size)]
+            else:
+                changed = {
+                    name for name in params.keys() | self._params.keys()
+                    if params.get(name, _MISSING) != self._params.get(name, _MISSING)
+                }
+                changes = []
+                root = self._update(old, params, changed, [path], 0, 0, changes, snapshot)
+        except PromptBuildError as e:
+            # Propager l'erreur en ajoutant le contexte
+            raise PromptBuildError(
+                f"Error building template '{self.template_name}': {str(e)}"
+            ) from e
+
+        self._root = root
+        self._params = params
+        return RenderUpdate(root.text, changes)
+
+    def _render(self, path: str, params: Dict[str, str], build_stack: List[str],
+                snapshot: Dict[str, Optional[CompiledTemplate]]) -> _Node:
+        """Render a subtree from scratch"""
+        builder = self.builder
+        compiled = builder._load(path, build_stack, snapshot)
+        parts: List[Union[_Slot, _Node]] = []
+        for segment in compiled.segments:
+            if segment.kind == TEXT:
+                parts.append(_Slot(segment.text))
+            elif segment.kind == PARAMETER:
+                parts.append(_Slot(
+                    builder._parameter_value(segment.flag, compiled, params, build_stack)
+                ))
+            else:
+                resolved_path = builder._resolve_symbol(segment.flag, compiled, params, build_stack)
+                parts.append(self._render(
+                    resolved_path, params, build_stack + [resolved_path], snapshot
+                ))
+        return _Node(path, compiled, builder.linker.subtree_params(path, params), parts)
+
+    def _update(self, node: _Node, params: Dict[str, str], changed: Set[str],
+                build_stack: List[str], old_pos: int, new_pos: int,
+                changes: List[ChangedRange],
+                snapshot: Dict[str, Optional[CompiledTemplate]]) -> _Node:
+        """Render again the parts of a subtree reading a changed parameter"""
+        if not node.params & changed:
+            return node
+
+        builder = self.builder
+        compiled = node.compiled
+        parts: List[Union[_Slot, _Node]] = []
+        moved = False
+        for segment, part in zip(compiled.segments, node.parts):
+            new_part = part
+            if segment.kind == PARAMETER and segment.flag.var_name in changed:
+                value = builder._parameter_value(segment.flag, compiled, params, build_stack)
+                if value != part.text:
+                    new_part = _Slot(value)
+                    _record(changes, old_pos, part.size, new_pos, new_part.size)
+            elif segment.kind not in (TEXT, PARAMETER):
+                resolved_path = builder._resolve_symbol(segment.flag, compiled, params, build_stack)
+                child_stack = build_stack + [resolved_path]
+                if resolved_path != part.path:
+                    # Le paramètre de chemin a changé : autre fichier
+                    new_part = self._render(resolved_path, params, child_stack, snapshot)
+                    _record(changes, old_pos, part.size, new_pos, new_part.size)
+                    moved = True
+                else:
+                    new_part = self._update(
+                        part, params, changed, child_stack, old_pos, new_pos, changes, snapshot
+                    )
+                    moved = moved or new_part.params is not part.params
+            old_pos += part.size
+            new_pos += new_part.size
+            parts.append(new_part)
+
+        # Les paramètres lus ne changent que si un chemin a changé
+        required = builder.linker.subtree_params(node.path, params) if moved else node.params
+        return _Node(node.path, compiled, required, parts)
+
+
+def _record(changes: List[ChangedRange], old_start: int, old_size: int,
+            new_start: int, new_size: int) -> None:
+    """Add a changed range, merged with the previous one if they touch"""
+    if changes and changes[-1].old_end == old_start and changes[-1].end == new_start:
+        last = changes.pop()
+        changes.append(last._replace(old_end=old_start + old_size, end=new_start + new_size))
+    else:
+        changes.append(ChangedRange(old_start, old_start + old_size, new_start, new_start + new_size))
@@ -0,0 +1,184 @@
+"""
+Opt-in instrumentation of the builder: timings, I/O counters and cache hits
+
+Components hold an `instrumentation` attribute, None by default: when
+disabled, every hook costs a single `is not None` check. Once enabled on a
+`BuilderState`, the loader, compiler, linker and builders record what they
+do into an `Instrumentation`, readable as a snapshot or streamed to callbacks.
+
+### Example
+```py
+instrumentation = Instrumentation()
+instrumentation.add_callback(lambda event: print(event))
+
+builder = PromptBuilder()
+builder.state.instrument(instrumentation)
+builder.build("debug_prompt", debug_username="golto")
+
+stats = instrumentation.snapshot()
+print(stats.bytes_read, stats.file_cache_hit_rate)
+for path, template in stats.templates.items():
+    print(path, template.renders, template.seconds)
+
+builder.state.instrument(None)
+```
+"""
+
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, List, NamedTuple
+
+# Types d'événements
+READ = "read"          # Fichier lu sur le disque
+SCAN = "scan"          # Fichier compilé (recherche des flags)
+ANALYZE = "analyze"    # Dépendances d'un fichier analysées
+INDEX = "index"        # Index du graphe construit
+RENDER = "render"      # Sous-arbre rendu (ou servi par le cache)
+BUILD = "build"        # Prompt complet construit
+
+
+class Event(NamedTuple):
+    """Something the builder did, passed to the callbacks"""
+    kind: str
+    name: str             # Chemin du fichier, ou nom du template pour "build"
+    seconds: float
+    bytes: int = 0        # Octets lus ("read") ou caractères scannés ("scan")
+    depth: int = 0        # Profondeur dans l'arbre ("render")
+    cached: bool = False  # Sous-arbre servi par le cache ("render")
+
+
+@dataclass
+class TemplateStats:
+    """Renders of one prompt file, with its subtree"""
+    renders: int = 0
+    cached: int = 0       # Rendus servis par le cache des sous-arbres
+    seconds: float = 0.0  # Temps total, sous-arbre compris
+
+
+@dataclass
+class InstrumentationStats:
+    """Snapshot of the counters of an `Instrumentation`"""
+    builds: int = 0
+    build_seconds: float = 0.0
+    files_read: int = 0
+    bytes_read: int = 0
+    read_seconds: float = 0.0
+    scans: int = 0
+    scan_seconds: float = 0.0
+    analyses: int = 0
+    analyze_seconds: float = 0.0
+    index_builds: int = 0
+    index_seconds: float = 0.0
+    path_formats: int = 0
+    path_format_seconds: float = 0.0
+    max_depth: int = 0
+    file_cache_hits: int = 0
+    file_cache_misses: int = 0
+    subtree_cache_hits: int = 0
+    subtree_cache_misses: int = 0
+    templates: Dict[str, TemplateStats] = field(default_factory=dict)
+
+    @property
+    def file_cache_hit_rate(self) -> float:
+        total = self.file_cache_hits + self.file_cache_misses
+        return self.file_cache_hits / total if total else 0.0
+
+    @property
+    def subtree_cache_hit_rate(self) -> float:
+        total = self.subtree_cache_hits + self.subtree_cache_misses
+        return self.subtree_cache_hits / total if total else 0.0
+
+
+class Instrumentation:
+    """Collects the counters and events of the builder components"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = InstrumentationStats()
+        self._callbacks: List[Callable[[Event], None]] = []
+
+    def add_callback(self, callback: Callable[[Event], None]) -> None:
+        """Call `callback` with every event (called in the thread of the event)"""
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[Event], None]) -> None:
+        self._callbacks.remove(callback)
+
+    def snapshot(self) -> InstrumentationStats:
+        """Copy of the counters"""
+        with self._lock:
+            return replace(
+                self._stats,
+                templates={path: replace(t) for path, t in self._stats.templates.items()}
+            )
+
+    def reset(self) -> None:
+        """Set every counter back to zero"""
+        with self._lock:
+            self._stats = InstrumentationStats()
+
+    # Points d'enregistrement appelés par les composants
+
+    def file_cache(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._stats.file_cache_hits += 1
+            else:
+                self._stats.file_cache_misses += 1
+
+    def read(self, path: str, size: int, seconds: float) -> None:
+        with self._lock:
+            self._stats.files_read += 1
+            self._stats.bytes_read += size
+            self._stats.read_seconds += seconds
+        self._emit(Event(READ, path, seconds, bytes=size))
+
+    def scan(self, path: str, size: int, seconds: float) -> None:
+        with self._lock:
+            self._stats.scans += 1
+            self._stats.scan_seconds += seconds
+        self._emit(Event(SCAN, path, seconds, bytes=size))
+
+    def analyze(self, path: str, seconds: float) -> None:
+        with self._lock:
+            self._stats.analyses += 1
+            self._stats.analyze_seconds += seconds
+        self._emit(Event(ANALYZE, path, seconds))
+
+    def index(self, seconds: float) -> None:
+        with self._lock:
+            self._stats.index_builds += 1
+            self._stats.index_seconds += seconds
+        self._emit(Event(INDEX, "", seconds))
+
+    def path_format(self, seconds: float) -> None:
+        # Trop fréquent pour un événement : compteur seulement
+        with self._lock:
+            self._stats.path_formats += 1
+            self._stats.path_format_seconds += seconds
+
+    def render(self, path: str, seconds: float, depth: int, cached: bool) -> None:
+        with self._lock:
+            stats = self._stats
+            template = stats.templates.get(path)
+            if template is None:
+                template = stats.templates[path] = TemplateStats()
+            template.renders += 1
+            template.seconds += seconds
+            if cached:
+                template.cached += 1
+                stats.subtree_cache_hits += 1
+            else:
+                stats.subtree_cache_misses += 1
+            stats.max_depth = max(stats.max_depth, depth)
+        self._emit(Event(RENDER, path, seconds, depth=depth, cached=cached))
+
+    def build(self, template_name: str, seconds: float) -> None:
+        with self._lock:
+            self._stats.builds += 1
+            self._stats.build_seconds += seconds
+        self._emit(Event(BUILD, template_name, seconds))
+
+    def _emit(self, event: Event) -> None:
+        for callback in self._callbacks:
+            callback(event)
@@ -1,18 +1,31 @@
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Set
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
 from pathlib import Path
 import re
+import threading
+import time
 
-from .analyzer import Analyzer, Flag
+from .analyzer import Flag, FlagSpan
+from .compiler import CompiledTemplate, Compiler, PARAMETER, TEXT
+from .loader import Loader
 from .template_loader import FlagTemplate, TemplateLoader
 
 class TemplateManager:
     """Manages flag to file templates"""
 
-    def __init__(self):
-        loader = TemplateLoader()
-        self.templates = loader.templates
-        self._template_map = loader._template_map
+    def __init__(self, templates: Optional[List[FlagTemplate]] = None,
+                 config_path: Optional[Union[str, Path]] = None):
+        if templates is None:
+            loader = TemplateLoader(config_path)
+            self.templates = loader.templates
+            self._template_map = loader._template_map
+        else:
+            # Templates déjà chargés (ex: depuis un bundle), sans lire le YAML
+            self.templates = templates
+            self._template_map = {
+                (t.flag_name, t.var_name): t.template
+                for t in templates
+            }
     
     def get_template(self, flag_name: str, var_name: str) -> Optional[str]:
         """Get template path for a flag"""
@@ -28,15 +41,68 @@ class Dependency:
     dependencies: Set[str]  # Chemins des fichiers dont ce fichier dépend
 
 
+@dataclass
+class Variant:
+    """
+    One way to build a template, for given values of its path parameters
+    - Example: "system_prompt" with `agent_name="tinia"`
+    """
+    binding: Dict[str, str]    # Valeurs des paramètres de chemin
+    required: FrozenSet[str]   # Tous les paramètres requis par l'arbre
+    order: Tuple[str, ...]     # Chemins concrets, dépendances en premier
+    sources: Tuple[CompiledTemplate, ...] = ()  # Fichiers compilés de l'arbre
+    error: Optional[str] = None  # Erreur de construction connue d'avance
+
+
+@dataclass
+class IndexNode:
+    """Flags of one concrete prompt file, whatever the parameter values"""
+    source: CompiledTemplate
+    params: FrozenSet[str]     # Paramètres lus par le fichier lui-même
+    symbols: Tuple[Tuple[Optional[str], FlagSpan], ...]  # (template, flag), dans l'ordre
+
+
+@dataclass
+class GraphIndex:
+    """
+    Dependency graph of the templates, parameterized ones included
+
+    Parameterized templates are enumerated from the files on disk and each
+    concrete file is analysed once. The subtrees of a build are combined on
+    first request and cached per concrete path, keyed only on the path
+    parameters that select files under that path: independent folders are
+    never multiplied together.
+    """
+    # template -> valeurs des paramètres de chemin -> chemin concret
+    candidates: Dict[str, Dict[Tuple[str, ...], str]] = field(default_factory=dict)
+    # chemin concret -> flags du fichier
+    nodes: Dict[str, IndexNode] = field(default_factory=dict)
+    # chemin concret -> paramètres de chemin qui choisissent des fichiers sous lui
+    selectors: Dict[str, FrozenSet[str]] = field(default_factory=dict)
+    # (chemin concret, valeurs de ses sélecteurs) -> sous-arbre combiné
+    subtrees: Dict[Tuple, Variant] = field(default_factory=dict)
+
+
 class Linker:
     """Links flags to their source files and manages dependencies"""
     
-    def __init__(self):
-        self.analyzer = Analyzer()
-        self.template_manager = TemplateManager()
+    def __init__(self, template_manager: Optional[TemplateManager] = None,
+                 compiler: Optional[Compiler] = None):
+        self.template_manager = template_manager or TemplateManager()
+        self.compiler = compiler or Compiler()
+        # Même analyzer (et donc même cache de fichiers) que le compilateur
+        self.analyzer = self.compiler.analyzer
         self.dependencies: Dict[str, Dependency] = {}
+        # Paramètres des sous-arbres sans template paramétré (indépendants des valeurs)
+        self._static_params: Dict[str, FrozenSet[str]] = {}
+        self._analyzing: Set[str] = set()
+        self._index: Optional[GraphIndex] = None
+        # Un seul thread analyse le graphe à la fois (linker partagé)
+        self._lock = threading.RLock()
+        # Instrumentation optionnelle (voir instrumentation.py)
+        self.instrumentation = None
     
-    def get_template_for_flag(self, flag: Flag) -> Optional[str]:
+    def get_template_for_flag(self, flag: Union[Flag, FlagSpan]) -> Optional[str]:
         """
         Get the template path for a flag, without applying parameters
         
@@ -50,41 +116,481 @@ class Linker:
         """
         Analyze dependencies for a file recursively
         """
-        if path in self.dependencies:
-            return self.dependencies[path]
+        dep = self.dependencies.get(path)
+        if dep is not None:
+            return dep
             
-        flags = self.analyzer.list_flags(path)
-        deps = set()
-        params = {}
+        with self._lock:
+            if path in self.dependencies:
+                return self.dependencies[path]
+            if path in self._analyzing:
+                # Dépendance circulaire : signalée lors de la construction
+                return Dependency(path=path, flags=set(), params={}, dependencies=set())
         
-        for flag in flags:
-            # Si c'est un parameter flag, l'ajouter aux paramètres requis
-            if flag.name == "parameter":
-                params[flag.var_name] = str
-                continue
+            instrumentation = self.instrumentation
+            start = time.perf_counter() if instrumentation is not None else 0.0
+            compiled = self.compiler.compile(path)
+            flags = [s.flag for s in compiled.segments if s.kind != TEXT] if compiled else []
+            deps = set()
+            params = {}
+            self._analyzing.add(path)
             
-            # Sinon, analyser le template du fichier
-            template = self.get_template_for_flag(flag)
-            if template:
-                # Collecter les paramètres du template
-                param_matches = re.finditer(r'\{(\w+)\}', template)
-                for match in param_matches:
-                    param_name = match.group(1)
-                    params[param_name] = str
+            for flag in flags:
+                # Si c'est un parameter flag, l'ajouter aux paramètres requis
+                if flag.name == "parameter":
+                    params[flag.var_name] = str
+                    continue
                 
-                deps.add(template)
+                # Sinon, analyser le template du fichier
+                template = self.get_template_for_flag(flag)
+                if template:
+                    # Collecter les paramètres du template
+                    param_matches = re.finditer(r'\{(\w+)\}', template)
+                    for match in param_matches:
+                        param_name = match.group(1)
+                        params[param_name] = str
                 
-                # Si le template ne contient pas de paramètres,
-                # on peut l'analyser récursivement
-                if not re.search(r'\{(\w+)\}', template):
-                    child_dep = self.analyze_dependencies(template)
-                    params.update(child_dep.params)
+                    deps.add(template)
         
-        dep = Dependency(
-            path=path,
-            flags={f.var_name for f in flags},
-            params=params,
-            dependencies=deps
+                    # Si le template ne contient pas de paramètres,
+                    # on peut l'analyser récursivement
+                    if not re.search(r'\{(\w+)\}', template):
+                        child_dep = self.analyze_dependencies(template)
+                        params.update(child_dep.params)
+        
+            self._analyzing.discard(path)
+            dep = Dependency(
+                path=path,
+                flags={f.var_name for f in flags},
+                params=params,
+                dependencies=deps
+            )
+            self.dependencies[path] = dep
+            if instrumentation is not None:
+                instrumentation.analyze(path, time.perf_counter() - start)
+            return dep
+
+    def invalidate_paths(self, paths: Iterable[str]) -> Set[str]:
+        """
+        Forget the dependency data of changed files and of the files that
+        depend on them, keeping the rest of the graph
+
+        The graph index forgets the changed files and the subtrees containing
+        them, and enumerates again the folders of the parameterized templates
+        they belong to; the other combined subtrees are kept.
+
+        Args:
+            paths: Changed files, relative to the prompts directory
+
+        Returns:
+            Set[str]: The changed files and all the files depending on them
+        """
+        changed = set(paths)
+        with self._lock:
+            affected = self._dependents(changed)
+            for path in affected:
+                self.dependencies.pop(path, None)
+                self._static_params.pop(path, None)
+            if self._index is not None:
+                self._index = self._reindex(self._index, changed)
+        return affected
+
+    def reload_templates(self, template_manager: TemplateManager) -> Set[str]:
+        """
+        Switch to a new template map (after `config/templates.yaml` changed)
+
+        Returns:
+            Set[str]: The files using a flag whose template changed, and all
+                the files depending on them
+        """
+        old = self.template_manager._template_map
+        new = template_manager._template_map
+        # (flag_name, var_name) dont le template a changé
+        changed_names = {
+            key[1] for key in old.keys() | new.keys()
+            if old.get(key) != new.get(key)
+        }
+
+        with self._lock:
+            self.template_manager = template_manager
+            roots = {
+                path for path, dep in self.dependencies.items()
+                if dep.flags & changed_names
+            }
+            affected = self._dependents(roots)
+            for path in affected:
+                self.dependencies.pop(path, None)
+                self._static_params.pop(path, None)
+            if self._index is not None:
+                self._index = self.build_index()
+        return affected
+
+    def _dependents(self, paths: Set[str]) -> Set[str]:
+        """Find `paths` and every analyzed file depending on them, directly or not"""
+        # template -> fichiers qui l'utilisent
+        reverse: Dict[str, Set[str]] = {}
+        for path, dep in self.dependencies.items():
+            for template in dep.dependencies:
+                reverse.setdefault(template, set()).add(path)
+
+        affected = set(paths)
+        pending = list(paths)
+        while pending:
+            child = pending.pop()
+            for template, parents in reverse.items():
+                if not _matches(template, child):
+                    continue
+                for parent in parents - affected:
+                    affected.add(parent)
+                    pending.append(parent)
+        return affected
+
+    def subtree_params(self, path: str, params: Dict[str, Any]) -> FrozenSet[str]:
+        """
+        Get every parameter read while rendering the subtree rooted at `path`
+
+        Parameterized templates (ex: "agents/{agent_name}/beginning.md") are
+        resolved with `params` to follow the file actually rendered.
+
+        Example:
+            For "debug/info/general.md" returns frozenset()
+            For "debug/main.md" returns frozenset({"debug_username"})
+        """
+        required, _ = self._collect_params(path, params, [])
+        return frozenset(required)
+
+    def _collect_params(self, path: str, params: Dict[str, Any],
+                        stack: List[str]) -> Tuple[Set[str], bool]:
+        """Collect the parameters of a subtree, and whether it is static"""
+        if path in self._static_params:
+            return set(self._static_params[path]), True
+
+        dep = self.analyze_dependencies(path)
+        required = set(dep.params)
+        static = True
+
+        for template in dep.dependencies:
+            if re.search(r'\{(\w+)\}', template):
+                static = False
+                try:
+                    child = template.format(**params)
+                except KeyError:
+                    # Paramètre manquant : signalé lors de la construction
+                    continue
+            else:
+                child = template
+
+            if child == path or child in stack:
+                # Dépendance circulaire : signalée lors de la construction
+                static = False
+                continue
+
+            child_params, child_static = self._collect_params(
+                child, params, stack + [path]
+            )
+            required |= child_params
+            static = static and child_static
+
+        if static:
+            self._static_params[path] = frozenset(required)
+        return required, static
+
+    @property
+    def indexed(self) -> bool:
+        """Whether the graph index is already built"""
+        return self._index is not None
+
+    @property
+    def index(self) -> GraphIndex:
+        """Complete graph index, built on first use"""
+        return self.ensure_index()
+
+    def ensure_index(self) -> GraphIndex:
+        """Build the graph index if it isn't built yet, and return it"""
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self.build_index()
+                index = self._index
+        return index
+
+    def seed_index(self, index: GraphIndex) -> None:
+        """Use a graph index built beforehand (ex: by a bundle) instead of building it"""
+        with self._lock:
+            self._index = index
+
+    def build_index(self) -> GraphIndex:
+        """
+        Build the graph index of every template
+
+        Parameterized templates are enumerated from the prompts directory
+        (ex: "agents/{agent_name}/beginning.md" -> agent_name="tinia"). The
+        files themselves are analysed by `lookup`, on first request.
+        """
+        instrumentation = self.instrumentation
+        start = time.perf_counter() if instrumentation is not None else 0.0
+        index = GraphIndex()
+        for t in self.template_manager.templates:
+            names = path_params(t.template)
+            if names:
+                index.candidates[t.template] = self._enumerate(t.template, names)
+        if instrumentation is not None:
+            instrumentation.index(time.perf_counter() - start)
+        return index
+
+    def lookup(self, template: str, params: Dict[str, Any]) -> Optional[Variant]:
+        """
+        Find the required parameters, build order and files of a build of `template`
+
+        Each file of the tree is analysed once, and each subtree is combined
+        once per value of the path parameters selecting files under it.
+
+        Returns:
+            Variant: The build of `template` for `params`, or None if a path
+                parameter of `template` itself is missing
+        """
+        try:
+            path = template.format(**params)
+        except KeyError:
+            return None
+        variant, _ = self._subtree(self.index, path, params, [path])
+        names = path_params(template)
+        if not names:
+            return variant
+        return Variant(
+            binding={**variant.binding, **{name: str(params[name]) for name in names}},
+            required=variant.required | set(names),
+            order=variant.order,
+            sources=variant.sources,
+            error=variant.error
         )
-        self.dependencies[path] = dep
-        return dep
+
+    def _node(self, index: GraphIndex, path: str) -> Optional[IndexNode]:
+        """Analyse a concrete file once, None if it doesn't exist"""
+        node = index.nodes.get(path)
+        if node is None:
+            compiled = self.compiler.compile(path)
+            if compiled is None:
+                # Pas mis en cache : le fichier peut apparaître
+                return None
+            node = IndexNode(
+                source=compiled,
+                params=frozenset(s.flag.var_name for s in compiled.segments if s.kind == PARAMETER),
+                symbols=tuple((self.get_template_for_flag(flag), flag) for flag in compiled.symbols)
+            )
+            index.nodes[path] = node
+        return node
+
+    def _selectors(self, index: GraphIndex, path: str,
+                   stack: Set[str]) -> Tuple[FrozenSet[str], bool]:
+        """Path parameters choosing a file anywhere under `path`, and whether the result is complete"""
+        if path in index.selectors:
+            return index.selectors[path], True
+        node = self._node(index, path)
+        if node is None:
+            return frozenset(), True
+
+        names: Set[str] = set()
+        complete = True
+        for template, _ in node.symbols:
+            if template is None:
+                continue
+            template_names = path_params(template)
+            names.update(template_names)
+            children = index.candidates.get(template, {}).values() if template_names else [template]
+            for child in children:
+                if child == path or child in stack:
+                    # Cycle : résultat partiel, pas mis en cache
+                    complete = False
+                    continue
+                child_names, child_complete = self._selectors(index, child, stack | {path})
+                names |= child_names
+                complete = complete and child_complete
+
+        if complete:
+            index.selectors[path] = frozenset(names)
+        return frozenset(names), complete
+
+    def _subtree(self, index: GraphIndex, path: str, params: Dict[str, Any],
+                 stack: List[str]) -> Tuple[Variant, bool]:
+        """
+        Combine the subtree rooted at the concrete file `path` for `params`
+
+        Returns:
+            Tuple: The combined subtree, and whether it could be cached
+        """
+        node = self._node(index, path)
+        if node is None:
+            build_path = " -> ".join(stack)
+            return Variant({}, frozenset(), (), (), f"File not found: {path}\nBuild path: {build_path}"), False
+
+        selectors, _ = self._selectors(index, path, set())
+        binding = {name: str(params[name]) for name in sorted(selectors) if name in params}
+        key = (path, tuple(binding.items()))
+        subtree = index.subtrees.get(key)
+        if subtree is not None:
+            return subtree, True
+
+        required = set(node.params)
+        order: List[str] = []
+        seen: Set[str] = set()
+        sources = [node.source]
+        error = None
+        cacheable = True
+        for template, flag in node.symbols:
+            if template is None:
+                build_path = " -> ".join(stack)
+                error = (
+                    f"Undefined flag '{flag.full_match}' "
+                    f"at line {node.source.line_number(flag.start)} in {path}\n"
+                    f"Build path: {build_path}"
+                )
+                break
+
+            names = path_params(template)
+            required.update(names)
+            try:
+                child = template.format(**params)
+            except KeyError:
+                # Paramètre de chemin manquant : signalé avec les paramètres requis
+                continue
+            if names:
+                values = tuple(str(params[name]) for name in names)
+                if index.candidates.get(template, {}).get(values) != child:
+                    # Dossier absent de l'index (ex: créé depuis) : sélecteurs incomplets
+                    cacheable = False
+
+            if child in stack:
+                cycle = " -> ".join(stack[stack.index(child):])
+                error = f"Circular dependency detected: {cycle}"
+                break
+
+            child_subtree, child_cacheable = self._subtree(index, child, params, stack + [child])
+            cacheable = cacheable and child_cacheable
+            required |= child_subtree.required
+            sources.extend(child_subtree.sources)
+            for p in child_subtree.order:
+                if p not in seen:
+                    seen.add(p)
+                    order.append(p)
+            if child_subtree.error is not None:
+                error = child_subtree.error
+                break
+
+        if path not in seen:
+            order.append(path)
+        subtree = Variant(binding, frozenset(required), tuple(order), tuple(sources), error)
+        # Un résultat sans erreur ne dépend pas de la pile (pas de cycle)
+        cacheable = cacheable and error is None
+        if cacheable:
+            index.subtrees[key] = subtree
+        return subtree, cacheable
+
+    def _reindex(self, index: GraphIndex, changed: Set[str]) -> GraphIndex:
+        """
+        Copy of `index` without the changed files and the subtrees containing them
+
+        The subtrees and selectors of files whose tree reaches neither a changed
+        file nor a template whose folders changed are kept.
+        """
+        candidates = dict(index.candidates)
+        moved: Set[str] = set()  # Templates dont un dossier a été ajouté ou supprimé
+        for template in candidates:
+            if any(_matches(template, path) for path in changed):
+                found = self._enumerate(template, path_params(template))
+                if found != candidates[template]:
+                    moved.add(template)
+                candidates[template] = found
+
+        # Fichiers indexés -> fichiers qui les utilisent
+        parents: Dict[str, Set[str]] = {}
+        stale = set(changed)
+        for path, node in index.nodes.items():
+            for template, _ in node.symbols:
+                if template is None:
+                    continue
+                if template in moved:
+                    stale.add(path)
+                children = index.candidates.get(template, {}).values() if path_params(template) else [template]
+                for child in children:
+                    parents.setdefault(child, set()).add(path)
+        pending = list(stale)
+        while pending:
+            for parent in parents.get(pending.pop(), ()):
+                if parent not in stale:
+                    stale.add(parent)
+                    pending.append(parent)
+
+        return GraphIndex(
+            candidates=candidates,
+            nodes={path: node for path, node in index.nodes.items() if path not in changed},
+            selectors={path: names for path, names in index.selectors.items() if path not in stale},
+            subtrees={key: subtree for key, subtree in index.subtrees.items()
+                      if stale.isdisjoint(subtree.order)}
+        )
+
+    def _enumerate(self, template: str, names: Tuple[str, ...]) -> Dict[Tuple[str, ...], str]:
+        """Find the concrete paths of a parameterized template on disk"""
+        loader = self.compiler.analyzer.loader
+        # "agents/{agent_name}/beginning.md" -> "agents/*/beginning.md"
+        pattern = re.sub(r'\{(\w+)\}', '*', template)
+
+        # Regex pour retrouver les valeurs des paramètres dans le chemin
+        regex = path_regex(template)
+
+        found = {}
+        for relative in loader.glob(pattern):
+            match = re.fullmatch(regex, relative)
+            if match:
+                found[tuple(match.group(name) for name in names)] = relative
+        return found
+
+
+def reachable_paths(loader: Loader, templates: List[FlagTemplate]) -> List[str]:
+    """List the prompt files of every template, enumerating parameterized folders"""
+    paths = set()
+    for t in templates:
+        if not re.search(r'\{(\w+)\}', t.template):
+            if loader.is_file(t.template):
+                paths.add(t.template)
+            continue
+
+        # "agents/{agent_name}/beginning.md" -> "agents/*/beginning.md"
+        pattern = re.sub(r'\{(\w+)\}', '*', t.template)
+        paths.update(loader.glob(pattern))
+    return sorted(paths)
+
+
+def path_params(template: str) -> Tuple[str, ...]:
+    """Names of the parameters of a template path, in order, without duplicates"""
+    return tuple(dict.fromkeys(re.findall(r'\{(\w+)\}', template)))
+
+
+def path_regex(template: str) -> str:
+    """
+    Regex matching the concrete paths of a template, with one named group
+    per path parameter
+
+    Example:
+        For "agents/{agent_name}/main.md" returns "agents/(?P<agent_name>[^/]+)/main\\.md"
+    """
+    regex = ""
+    seen = set()
+    for part in re.split(r'(\{\w+\})', template):
+        match = re.fullmatch(r'\{(\w+)\}', part)
+        if match is None:
+            regex += re.escape(part)
+        elif match.group(1) in seen:
+            regex += f"(?P={match.group(1)})"
+        else:
+            seen.add(match.group(1))
+            regex += f"(?P<{match.group(1)}>[^/]+)"
+    return regex
+
+
+def _matches(template: str, path: str) -> bool:
+    """Check whether `path` is one of the concrete paths of `template`"""
+    if template == path:
+        return True
+    return bool(path_params(template)) and re.fullmatch(path_regex(template), path) is not None
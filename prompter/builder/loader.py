@@ -1,14 +1,269 @@
 import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, Union
+
+
+@dataclass
+class CacheStats:
+    """Snapshot of the counters of a `FileCache`"""
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int          # Taille totale des fichiers en cache (octets)
+    max_bytes: int
+
+
+@dataclass
+class _CacheEntry:
+    content: str
+    mtime_ns: int
+    size: int
+
+
+class FileCache:
+    """LRU cache of prompt file contents, bounded by a byte budget
+
+    Entries are revalidated with a single `stat` (mtime_ns and size) on
+    every read. For immutable deployments, `validate=False` skips the
+    revalidation and serves cached contents without touching the disk.
+
+### Example:
+    ```py
+    cache = FileCache(max_bytes=8 * 1024 * 1024)
+    loader = Loader(cache=cache)
+
+    loader.read_prompt("agents/main.md")  # miss: le fichier est lu
+    loader.read_prompt("agents/main.md")  # hit: un seul stat
+
+    print(cache.stats())
+    ```
+    """
+
+    DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, validate: bool = True):
+        self.max_bytes = max_bytes
+        self.validate = validate
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Path, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Instrumentation optionnelle (voir instrumentation.py)
+        self.instrumentation = None
+
+    def read(self, path: Path) -> Optional[str]:
+        """
+        Read a file through the cache
+
+        Args:
+            path: Absolute path of the file
+
+        Returns:
+            str: Content of the file
+            None: If file doesn't exist
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and not self.validate:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                if self.instrumentation is not None:
+                    self.instrumentation.file_cache(True)
+                return entry.content
+
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._discard(path)
+                self.misses += 1
+            if self.instrumentation is not None:
+                self.instrumentation.file_cache(False)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if (entry is not None
+                    and entry.mtime_ns == stat.st_mtime_ns
+                    and entry.size == stat.st_size):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                if self.instrumentation is not None:
+                    self.instrumentation.file_cache(True)
+                return entry.content
+            self.misses += 1
+
+        instrumentation = self.instrumentation
+        start = time.perf_counter() if instrumentation is not None else 0.0
+        content = path.read_text(encoding='utf-8')
+        if instrumentation is not None:
+            instrumentation.file_cache(False)
+            instrumentation.read(str(path), stat.st_size, time.perf_counter() - start)
+
+        with self._lock:
+            self._store(path, _CacheEntry(content, stat.st_mtime_ns, stat.st_size))
+        return content
+
+    def put(self, path: Path, content: str, mtime_ns: int, size: int) -> None:
+        """Store a content known to match the file stat (mtime_ns and size)"""
+        with self._lock:
+            self._store(path, _CacheEntry(content, mtime_ns, size))
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Drop the entry for `path`, or every entry if no path is given"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self.size = 0
+            else:
+                self._discard(path)
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the cache counters"""
+        with self._lock:
+            return CacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self._entries),
+                size=self.size,
+                max_bytes=self.max_bytes
+            )
+
+    def _store(self, path: Path, entry: _CacheEntry) -> None:
+        self._discard(path)
+        # Un fichier plus gros que le budget n'est jamais mis en cache
+        if entry.size > self.max_bytes:
+            return
+
+        self._entries[path] = entry
+        self.size += entry.size
+
+        # Éviction LRU jusqu'à revenir sous le budget
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+            self.evictions += 1
+
+    def _discard(self, path: Path) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def __repr__(self) -> str:
+        return (
+            f"FileCache(entries={len(self._entries)}, size={self.size}, "
+            f"max_bytes={self.max_bytes}, validate={self.validate})"
+        )
+
+
+class PromptSource(ABC):
+    """Storage the prompt files are read from, behind `Loader`
+
+    Paths are relative to the root of the prompts (ex: "agents/main.md").
+    """
+
+    # Les fichiers peuvent changer pendant l'exécution (revalidés à la lecture)
+    mutable: bool = True
+
+    @abstractmethod
+    def read(self, relative_path: str) -> Optional[str]:
+        """Content of a prompt file, or None if it doesn't exist"""
+        pass
+
+    @abstractmethod
+    def is_file(self, relative_path: str) -> bool:
+        """Check whether a prompt file exists"""
+        pass
+
+    @abstractmethod
+    def glob(self, pattern: str) -> List[str]:
+        """Relative paths of the files matching a pattern (`*` stays within a folder)"""
+        pass
+
+    @abstractmethod
+    def signature(self, relative_path: str) -> Tuple[int, int]:
+        """Cheap version of a file, without reading it ((-1, -1) if it doesn't exist)"""
+        pass
+
+    def invalidate(self, relative_path: Optional[str] = None) -> None:
+        """Forget what is cached about a file, or about every file"""
+        pass
+
+
+class DirectorySource(PromptSource):
+    """Prompt files stored in a directory, read through a `FileCache`"""
+
+    def __init__(self, root: Union[str, Path], cache: Optional[FileCache] = None):
+        self.root = Path(root)
+        # Cache du contenu des fichiers (désactivable avec FileCache(max_bytes=0))
+        self.cache = cache if cache is not None else FileCache()
+        # Chemins absolus déjà construits (Path / str est coûteux)
+        self._paths: Dict[str, Path] = {}
+
+        if not self.root.exists():
+            raise FileNotFoundError(
+                f"Prompts directory not found at {self.root}"
+            )
+
+    @property
+    def mutable(self) -> bool:
+        return self.cache.validate
+
+    def path(self, relative_path: str) -> Path:
+        """Absolute path of a prompt file"""
+        path = self._paths.get(relative_path)
+        if path is None:
+            path = self._paths[relative_path] = self.root / relative_path
+        return path
+
+    def read(self, relative_path: str) -> Optional[str]:
+        return self.cache.read(self.path(relative_path))
+
+    def is_file(self, relative_path: str) -> bool:
+        return (self.root / relative_path).is_file()
+
+    def glob(self, pattern: str) -> List[str]:
+        return [
+            match.relative_to(self.root).as_posix()
+            for match in self.root.glob(pattern)
+            if match.is_file()
+        ]
+
+    def signature(self, relative_path: str) -> Tuple[int, int]:
+        # (mtime_ns, size), les mêmes valeurs que le FileCache
+        try:
+            stat = self.path(relative_path).stat()
+        except FileNotFoundError:
+            return (-1, -1)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def invalidate(self, relative_path: Optional[str] = None) -> None:
+        self.cache.invalidate(None if relative_path is None else self.path(relative_path))
+
+    def __repr__(self) -> str:
+        return f"DirectorySource(root={str(self.root)!r})"
+
 
 class Loader:
-    """Load prompt files from the prompts directory
+    """Load prompt files from the prompts directory, or from another source
 
 ### Example:
     ```py
     loader = Loader()
 
+    # Autre répertoire, ou pack de prompts (voir pack.py)
+    loader = Loader(root="/srv/prompts")
+    loader = Loader(source=PackSource("prompts.pack"))
+
     # Lire un prompt
     content = loader.read_prompt("agents/main.md")
     if content:
@@ -23,16 +278,40 @@ class Loader:
     ```
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[FileCache] = None,
+                 root: Optional[Union[str, Path]] = None,
+                 source: Optional[PromptSource] = None):
+        """
+        Args:
+            cache: File cache of the directory source
+            root: Prompts directory (default: `prompts/` next to loader.py)
+            source: Storage to read from instead of a directory (ex: `PackSource`)
+
+        Raises:
+            ValueError: If `source` is given with `cache` or `root`, which only
+                configure the directory source
+        """
+        if source is not None and (cache is not None or root is not None):
+            raise ValueError(
+                "cache and root configure the directory source, "
+                f"they can't be used with source={source!r}"
+            )
         # Get the directory where loader.py is located
         self.module_dir = Path(__file__).parent
-        # The prompts directory is a sibling of loader.py
-        self.prompts_dir = self.module_dir / "prompts"
-        
-        if not self.prompts_dir.exists():
-            raise FileNotFoundError(
-                f"Prompts directory not found at {self.prompts_dir}"
+        if source is None:
+            # The prompts directory is a sibling of loader.py
+            source = DirectorySource(
+                root if root is not None else self.module_dir / "prompts", cache
             )
+        self.source = source
+        # Répertoire et cache uniquement pour une source de type dossier
+        self.prompts_dir: Optional[Path] = getattr(source, "root", None)
+        self.cache: Optional[FileCache] = getattr(source, "cache", None)
+        
+    @property
+    def mutable(self) -> bool:
+        """Whether the prompt files can change and must be revalidated"""
+        return self.source.mutable
     
     def get_prompt_path(self, relative_path: str) -> Path:
         """
@@ -44,12 +323,17 @@ class Loader:
         
         Returns:
             Path: Absolute path to the prompt file
+        
+        Raises:
+            ValueError: If the prompts are not stored in a directory
         """
+        if self.prompts_dir is None:
+            raise ValueError(f"Prompts are not stored in a directory: {self.source!r}")
         return self.prompts_dir / relative_path
     
     def read_prompt(self, relative_path: str) -> Optional[str]:
         """
-        Read a prompt file's content
+        Read a prompt file's content from the source
         
         Args:
             relative_path: Path relative to the prompts directory
@@ -59,9 +343,26 @@ class Loader:
             str: Content of the prompt file
             None: If file doesn't exist
         """
-        prompt_path = self.get_prompt_path(relative_path)
+        return self.source.read(relative_path)
         
-        if not prompt_path.exists():
-            return None
-            
-        return prompt_path.read_text(encoding='utf-8')
\ No newline at end of file
+    def is_file(self, relative_path: str) -> bool:
+        """Check whether a prompt file exists"""
+        return self.source.is_file(relative_path)
+
+    def glob(self, pattern: str) -> List[str]:
+        """
+        Find the prompt files matching a pattern
+
+        Example:
+            For "agents/*/beginning.md" returns ["agents/tinia/beginning.md"]
+        """
+        return self.source.glob(pattern)
+
+    def signature(self, relative_path: str) -> Tuple[int, int]:
+        """Cheap version of a prompt file, ex: (mtime_ns, size) in a directory"""
+        return self.source.signature(relative_path)
+
+    def invalidate(self, relative_path: Optional[str] = None) -> None:
+        """Forget the cached content of a prompt file, or of every file"""
+        self.source.invalidate(relative_path)
+        
\ No newline at end of file
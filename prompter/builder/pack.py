@@ -0,0 +1,157 @@
+"""
+Single-file prompt pack, read through `mmap`
+
+A pack holds every prompt file of a directory in one file: a small header,
+the concatenated UTF-8 contents, then an index of their offsets. Reading a
+prompt slices the memory map, without opening any file.
+
+Layout:
+```
+b"PRMPACK1"                       magic
+uint64 index_offset, index_size   little endian
+contents...                       UTF-8, newlines already translated to "\\n"
+index                             JSON {"agents/main.md": [offset, size], ...}
+```
+
+### Example
+```py
+# Étape de build (une seule fois, ex: dans l'image Docker)
+write_pack("prompts.pack")
+
+# Au démarrage
+loader = Loader(source=PackSource("prompts.pack"))
+builder = PromptBuilder(state=BuilderState(loader=loader))
+```
+
+Or from the command line:
+```bash
+python -m prompter.builder.pack prompts.pack --root path/to/prompts
+```
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .loader import Loader, PromptSource
+
+PACK_MAGIC = b"PRMPACK1"
+_HEADER = struct.Struct("<8sQQ")
+
+
+class PackError(Exception):
+    """Custom error for unreadable prompt packs"""
+    pass
+
+
+class PackSource(PromptSource):
+    """Prompt files stored in a pack written by `write_pack`
+
+    A pack is immutable: compiled templates are never revalidated.
+    """
+
+    mutable = False
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            size = f.seek(0, 2)
+            if size < _HEADER.size:
+                raise PackError(f"Not a prompt pack: {self.path}")
+            # Le mapping reste valide après la fermeture du fichier
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # Un pack réécrit change de mtime : toutes ses signatures changent
+            self._mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+
+        magic, index_offset, index_size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != PACK_MAGIC or index_offset + index_size > size:
+            self._mmap.close()
+            raise PackError(f"Not a prompt pack: {self.path}")
+
+        raw_index = self._mmap[index_offset:index_offset + index_size]
+        self.index: Dict[str, Tuple[int, int]] = {
+            name: (offset, length)
+            for name, (offset, length) in json.loads(raw_index.decode("utf-8")).items()
+        }
+
+    def read(self, relative_path: str) -> Optional[str]:
+        entry = self.index.get(relative_path)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self._mmap[offset:offset + length].decode("utf-8")
+
+    def is_file(self, relative_path: str) -> bool:
+        return relative_path in self.index
+
+    def glob(self, pattern: str) -> List[str]:
+        # Même sémantique que Path.glob pour "*" : pas de "/" dans le segment
+        regex = re.compile(
+            "[^/]*".join(re.escape(part) for part in pattern.split("*"))
+        )
+        return sorted(name for name in self.index if regex.fullmatch(name))
+
+    def signature(self, relative_path: str) -> Tuple[int, int]:
+        entry = self.index.get(relative_path)
+        if entry is None:
+            return (-1, -1)
+        return (self._mtime_ns, entry[1])
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __repr__(self) -> str:
+        return f"PackSource(path={str(self.path)!r}, files={len(self.index)})"
+
+
+def write_pack(output_path: Union[str, Path],
+               root: Optional[Union[str, Path]] = None) -> Dict[str, Tuple[int, int]]:
+    """
+    Write every file of a prompts directory into a pack
+
+    Args:
+        output_path: Path of the pack file to write
+        root: Prompts directory (default: `prompts/` next to loader.py)
+
+    Returns:
+        Dict: The index of the pack, relative path -> (offset, size)
+    """
+    loader = Loader(root=root)
+    prompts_dir = loader.prompts_dir
+
+    index = {}
+    with open(output_path, "wb") as f:
+        f.write(_HEADER.pack(PACK_MAGIC, 0, 0))
+        for path in sorted(p for p in prompts_dir.rglob("*") if p.is_file()):
+            name = path.relative_to(prompts_dir).as_posix()
+            # read_text traduit les fins de ligne, comme le loader de dossier
+            data = path.read_text(encoding="utf-8").encode("utf-8")
+            index[name] = (f.tell(), len(data))
+            f.write(data)
+
+        raw_index = json.dumps(index, ensure_ascii=False).encode("utf-8")
+        index_offset = f.tell()
+        f.write(raw_index)
+        f.seek(0)
+        f.write(_HEADER.pack(PACK_MAGIC, index_offset, len(raw_index)))
+    return index
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a prompts directory into a pack")
+    parser.add_argument("output", help="Path of the pack file to write")
+    parser.add_argument("--root", help="Prompts directory (default: the package prompts)")
+    args = parser.parse_args()
+
+    index = write_pack(args.output, args.root)
+    print(f"{len(index)} prompt files packed into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Set, Union
+
+from .analyzer import Analyzer
+from .compiler import CompiledTemplate, Compiler
+from .linker import Linker, TemplateManager
+from .loader import Loader
+from .template_loader import TemplateLoader
+
+if TYPE_CHECKING:
+    from .builder import PinnedPrefix
+    from .instrumentation import Instrumentation
+
+
+class BuilderState:
+    """Components and caches used by `PromptBuilder`, created on first use
+
+    The process-wide state returned by `BuilderState.shared()` is used by
+    every `PromptBuilder()`, so constructing a builder costs close to nothing
+    and all builders share the warmed file cache, compiled templates,
+    dependency graph and rendered subtrees.
+
+### Example
+    ```py
+    # Partagé par tous les builders du processus
+    state = BuilderState.shared()
+    assert PromptBuilder().state is PromptBuilder().state
+
+    # État privé, ex: avec un bundle ou un pack de prompts
+    state = BuilderState(bundle="prompts.bundle")
+    state = BuilderState(loader=Loader(source=PackSource("prompts.pack")))
+    builder = PromptBuilder(state=state)
+    ```
+    """
+
+    DEFAULT_SUBTREE_CACHE_SIZE = 1024
+
+    _shared: Optional["BuilderState"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, subtree_cache_size: int = DEFAULT_SUBTREE_CACHE_SIZE,
+                 bundle: Optional[Union[str, Path]] = None,
+                 bundle_verify: str = "stat",
+                 loader: Optional[Loader] = None,
+                 config_path: Optional[Union[str, Path]] = None,
+                 revalidate: bool = True):
+        """
+        Args:
+            subtree_cache_size: Maximum number of rendered subtrees kept in cache
+            bundle: Bundle written by `compile_bundle`, loaded right away and
+                checked against `loader` and `config_path`
+            bundle_verify: How to detect a stale bundle ("stat", "content" or "none")
+            loader: Loader of the prompt files (ex: other root, prompt pack)
+            config_path: Template configuration (default: `config/templates.yaml`)
+            revalidate: Check the files on every read (see `revalidate`)
+        """
+        self.subtree_cache_size = subtree_cache_size
+        self._loader = loader
+        self.config_path = Path(config_path) if config_path is not None else TemplateLoader.CONFIG_PATH
+        self._lock = threading.RLock()
+        self._analyzer: Optional[Analyzer] = None
+        self._compiler: Optional[Compiler] = None
+        self._linker: Optional[Linker] = None
+        self._subtree_cache = None
+        self._io_executor: Optional[ThreadPoolExecutor] = None
+        # Préfixes figés par build_prefixed(stable=True), par template
+        self.pinned_prefixes: Dict[str, "PinnedPrefix"] = {}
+        # Instrumentation optionnelle, voir instrument()
+        self.instrumentation: Optional["Instrumentation"] = None
+        self._revalidate = revalidate
+
+        if bundle is not None:
+            # Import local : bundle.py dépend des modules du builder
+            from .bundle import load_bundle
+
+            # Le bundle est vérifié contre les sources de cet état
+            loaded = load_bundle(bundle, bundle_verify, self.analyzer.loader, self.config_path)
+            self._linker = Linker(TemplateManager(loaded.templates), compiler=self.compiler)
+            loaded.seed(self.compiler, self._linker)
+
+    @classmethod
+    def shared(cls) -> "BuilderState":
+        """Get the process-wide state, creating it on first call"""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def reset_shared(cls) -> None:
+        """Drop the process-wide state, the next builder will create a new one"""
+        with cls._shared_lock:
+            cls._shared = None
+
+    @property
+    def analyzer(self) -> Analyzer:
+        if self._analyzer is None:
+            with self._lock:
+                if self._analyzer is None:
+                    self._analyzer = Analyzer(self._loader)
+                    self._attach()
+        return self._analyzer
+
+    @property
+    def compiler(self) -> Compiler:
+        if self._compiler is None:
+            with self._lock:
+                if self._compiler is None:
+                    self._compiler = Compiler(self.analyzer)
+                    self._attach()
+        return self._compiler
+
+    @property
+    def linker(self) -> Linker:
+        if self._linker is None:
+            with self._lock:
+                if self._linker is None:
+                    # Le YAML n'est lu qu'ici, au premier besoin
+                    self._linker = Linker(
+                        TemplateManager(config_path=self.config_path), compiler=self.compiler
+                    )
+                    self._attach()
+        return self._linker
+
+    @property
+    def subtree_cache(self):
+        if self._subtree_cache is None:
+            with self._lock:
+                if self._subtree_cache is None:
+                    # Import local : builder.py dépend de ce module
+                    from .builder import SubtreeCache
+                    self._subtree_cache = SubtreeCache(self.subtree_cache_size)
+        return self._subtree_cache
+
+    @property
+    def io_executor(self) -> ThreadPoolExecutor:
+        """Threads reading prompt files for the async API, off the event loop"""
+        if self._io_executor is None:
+            with self._lock:
+                if self._io_executor is None:
+                    self._io_executor = ThreadPoolExecutor(thread_name_prefix="prompter-io")
+        return self._io_executor
+
+    def instrument(self, instrumentation: Optional["Instrumentation"]) -> None:
+        """
+        Record timings, I/O and cache statistics of every builder using this state
+
+        Args:
+            instrumentation: Collector of the statistics, or None to disable it
+        """
+        with self._lock:
+            self.instrumentation = instrumentation
+            self._attach()
+
+    @property
+    def revalidate(self) -> bool:
+        """
+        Whether builds check the prompt files with a `stat` on every read
+
+        Disable it for immutable deployments or when a `PromptWatcher` runs:
+        builds then do no disk I/O at all once the files are cached. The
+        setting only changes the file cache of this state.
+        """
+        return self._revalidate
+
+    @revalidate.setter
+    def revalidate(self, value: bool) -> None:
+        with self._lock:
+            self._revalidate = value
+            if self._analyzer is not None and self._analyzer.loader.cache is not None:
+                self._analyzer.loader.cache.validate = value
+
+    def _attach(self) -> None:
+        """Give the instrumentation to the components already created"""
+        if self._analyzer is not None and self._analyzer.loader.cache is not None:
+            self._analyzer.loader.cache.instrumentation = self.instrumentation
+            if not self._revalidate:
+                self._analyzer.loader.cache.validate = False
+        if self._compiler is not None:
+            self._compiler.instrumentation = self.instrumentation
+        if self._linker is not None:
+            self._linker.instrumentation = self.instrumentation
+
+    def apply_changes(self, paths: Iterable[str],
+                      recompiled: Optional[Dict[str, CompiledTemplate]] = None) -> Set[str]:
+        """
+        Invalidate the caches after prompt files changed on disk
+
+        Only the changed files, the files depending on them (reverse
+        dependencies) and the subtrees rendered from them are dropped, the
+        rest of the warm caches is kept.
+
+        Args:
+            paths: Changed files, relative to the prompts directory
+            recompiled: New compilations of some of these files, already read
+                from disk by the caller: kept in the file cache and compiler
+
+        Returns:
+            Set[str]: The files whose cached data was dropped
+        """
+        changed = set(paths)
+        recompiled = recompiled or {}
+        with self._lock:
+            if self._analyzer is not None:
+                loader = self._analyzer.loader
+                for path in changed.difference(recompiled):
+                    loader.invalidate(path)
+            if self._compiler is not None:
+                for path in changed:
+                    if path in recompiled:
+                        self._compiler.compiled[path] = recompiled[path]
+                    else:
+                        self._compiler.invalidate(path)
+
+            affected = set(changed)
+            if self._linker is not None:
+                affected |= self._linker.invalidate_paths(changed)
+            if self._subtree_cache is not None:
+                self._subtree_cache.discard_paths(affected)
+        return affected
+
+    def reload_config(self) -> Set[str]:
+        """
+        Read `config/templates.yaml` again and invalidate the files using a
+        flag whose template changed
+
+        Returns:
+            Set[str]: The files whose cached data was dropped
+        """
+        with self._lock:
+            if self._linker is None:
+                # Rien n'est chargé : le YAML sera lu au premier besoin
+                return set()
+            affected = self._linker.reload_templates(TemplateManager(config_path=self.config_path))
+            if self._subtree_cache is not None:
+                self._subtree_cache.discard_paths(affected)
+        return affected
+
+    def __repr__(self) -> str:
+        loaded = [
+            name for name in ("analyzer", "compiler", "linker", "subtree_cache")
+            if getattr(self, f"_{name}") is not None
+        ]
+        return f"BuilderState(loaded=[{', '.join(loaded)}])"
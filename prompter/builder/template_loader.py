@@ -1,7 +1,7 @@
 
 from pathlib import Path
 import yaml
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 from dataclasses import dataclass
 
 @dataclass
@@ -14,9 +14,11 @@ class FlagTemplate:
 class TemplateLoader:
     """Loads and manages template configurations"""
     
-    def __init__(self):
+    CONFIG_PATH = Path(__file__).parent / "config" / "templates.yaml"
+    
+    def __init__(self, config_path: Optional[Union[str, Path]] = None):
         self.base_path = Path(__file__).parent
-        self.config_path = self.base_path / "config" / "templates.yaml"
+        self.config_path = Path(config_path) if config_path is not None else self.CONFIG_PATH
         self.templates = self._load_templates()
         self._template_map = self._build_template_map()
     
@@ -0,0 +1,333 @@
+"""
+Hot reload of the prompts directory and of `config/templates.yaml`
+
+The watcher sleeps on inotify (Linux) and falls back to polling elsewhere.
+With inotify, only the files named by the events are compared with the
+previous snapshot (every file if the kernel queue overflowed); the polling
+fallback compares every file. Only the changed files, the files depending on
+them and the subtrees rendered from them are invalidated; the rest of the
+warm caches is kept.
+
+### Example
+```py
+builder = PromptBuilder()
+
+with PromptWatcher():
+    # Les modifications de prompts/ et du YAML sont prises en compte
+    # sans redémarrer
+    serve(builder)
+```
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .state import BuilderState
+
+# Événements inotify (voir inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+_WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+
+
+class _Inotify:
+    """Minimal inotify binding through ctypes, reporting the changed paths"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        # AttributeError hors Linux : le watcher passe alors en polling
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        # Dossier surveillé -> descripteur de watch, et l'inverse
+        self.watched: Dict[str, int] = {}
+        self._directories: Dict[int, str] = {}
+
+    def watch(self, directory: str) -> None:
+        """Watch a directory (not recursive), once"""
+        if directory in self.watched:
+            return
+        wd = self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd >= 0:
+            # Dossier déplacé : le noyau rend le même watch, sous le nouveau nom
+            moved = self._directories.get(wd)
+            if moved is not None:
+                del self.watched[moved]
+            self.watched[directory] = wd
+            self._directories[wd] = directory
+
+    def wait(self, timeout: float) -> bool:
+        """Wait for events, return whether any was received"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        return bool(ready)
+
+    def drain(self) -> Optional[Set[str]]:
+        """
+        Read the pending events
+
+        Returns:
+            Set[str]: Paths of the files and folders named by the events
+            None: If events were lost (queue overflow), every file must be compared
+        """
+        paths: Optional[Set[str]] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return paths
+            if not data:
+                return paths
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+                name = data[offset + 16:offset + 16 + length].rstrip(b"\0")
+                offset += 16 + length
+                if mask & IN_Q_OVERFLOW:
+                    paths = None
+                    continue
+                directory = self._directories.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    # Dossier supprimé ou déplacé : le noyau a retiré le watch
+                    del self._directories[wd]
+                    if self.watched.get(directory) == wd:
+                        del self.watched[directory]
+                if paths is not None:
+                    paths.add(os.path.join(directory, os.fsdecode(name)) if name else directory)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PromptWatcher:
+    """Watch prompt files and the template configuration, and invalidate
+    the caches of a `BuilderState` when they change
+
+    Args:
+        state: State to keep up to date (default: the process-wide state)
+        interval: Polling period in seconds (also the stop latency with inotify)
+        backend: "auto", "inotify" or "poll"
+        debounce: Delay in seconds to group the writes of a single save
+        on_change: Called with the files whose cached data was dropped
+
+### Example
+    ```py
+    watcher = PromptWatcher(on_change=lambda paths: print("Reloaded:", paths))
+    watcher.start()
+    ...
+    watcher.stop()
+
+    # Sans thread : vérifier à la demande (ex: avant chaque requête)
+    watcher = PromptWatcher(backend="poll")
+    watcher.check()
+    ```
+    """
+
+    def __init__(self, state: Optional[BuilderState] = None,
+                 interval: float = 1.0, backend: str = "auto",
+                 debounce: float = 0.05,
+                 on_change: Optional[Callable[[Set[str]], None]] = None):
+        if backend not in ("auto", "inotify", "poll"):
+            raise ValueError(f"Unknown watcher backend: {backend}")
+
+        self.state = state or BuilderState.shared()
+        self.interval = interval
+        self.debounce = debounce
+        self.on_change = on_change
+        self.last_error: Optional[Exception] = None
+
+        self.prompts_dir = self.state.analyzer.loader.prompts_dir
+        if self.prompts_dir is None:
+            raise ValueError("Only prompts stored in a directory can be watched")
+        self.config_path = self.state.config_path
+
+        self._inotify: Optional[_Inotify] = None
+        if backend != "poll":
+            try:
+                self._inotify = _Inotify()
+            except (AttributeError, OSError):
+                if backend == "inotify":
+                    raise
+        self.backend = "inotify" if self._inotify is not None else "poll"
+
+        self._files, self._config = self._scan()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> "PromptWatcher":
+        """Watch in a background thread"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="PromptWatcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """Stop watching and release the inotify descriptor"""
+        self.stop()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self) -> "PromptWatcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def check(self, paths: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Compare the files with the previous snapshot and invalidate what changed
+
+        Args:
+            paths: Files and folders to compare, as reported by inotify
+                (default: every file of the prompts directory and the YAML)
+
+        Returns:
+            Set[str]: The files whose cached data was dropped
+        """
+        with self._lock:
+            if paths is None:
+                files, config = self._scan()
+                changed = {
+                    path for path in files.keys() | self._files.keys()
+                    if files.get(path) != self._files.get(path)
+                }
+                self._files = files
+            else:
+                paths = set(paths)
+                changed = self._update(paths)
+                config = (
+                    _stat(str(self.config_path)) if str(self.config_path) in paths
+                    else self._config
+                )
+            config_changed = config != self._config
+            self._config = config
+
+            affected: Set[str] = set()
+            if changed:
+                affected |= self.state.apply_changes(changed)
+            if config_changed:
+                # Un YAML invalide (sauvegarde en cours) lève ici : l'ancienne
+                # configuration reste en place jusqu'à la prochaine modification
+                affected |= self.state.reload_config()
+
+        if (changed or config_changed) and self.on_change is not None:
+            self.on_change(affected)
+        return affected
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            paths: Optional[Set[str]] = None
+            if self._inotify is not None:
+                if not self._inotify.wait(self.interval):
+                    continue
+                # Regrouper les écritures d'une même sauvegarde
+                self._stop.wait(self.debounce)
+                paths = self._inotify.drain()
+            elif self._stop.wait(self.interval):
+                break
+
+            try:
+                self.check(paths)
+            except Exception as e:
+                self.last_error = e
+
+    def _update(self, paths: Set[str]) -> Set[str]:
+        """Update the snapshot for the paths named by inotify, return the changed files"""
+        root = str(self.prompts_dir)
+        changed: Set[str] = set()
+        for path in paths:
+            if path == root:
+                relative = ""
+            elif path.startswith(root + os.sep):
+                relative = Path(path).relative_to(self.prompts_dir).as_posix()
+            else:
+                # Autre fichier du dossier de la configuration
+                continue
+
+            if relative and (relative in self._files or os.path.isfile(path)):
+                signature = _stat(path)
+                current = {relative: signature} if signature is not None else {}
+                previous = {relative: self._files[relative]} if relative in self._files else {}
+            else:
+                # Dossier créé, déplacé ou supprimé : comparer tout son contenu
+                prefix = relative + "/" if relative else ""
+                current = self._walk(path)
+                previous = {p: s for p, s in self._files.items() if p.startswith(prefix)}
+
+            for p in current.keys() | previous.keys():
+                if current.get(p) != previous.get(p):
+                    changed.add(p)
+            for p in previous.keys() - current.keys():
+                del self._files[p]
+            self._files.update(current)
+        return changed
+
+    def _scan(self) -> Tuple[Dict[str, Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """Snapshot (mtime_ns, size) of every prompt file and of the YAML"""
+        files = self._walk(str(self.prompts_dir))
+        if self._inotify is not None:
+            self._inotify.watch(str(self.config_path.parent))
+        return files, _stat(str(self.config_path))
+
+    def _walk(self, directory: str) -> Dict[str, Tuple[int, int]]:
+        """Snapshot of the prompt files under a folder, watching its subfolders"""
+        files = {}
+        directories: List[str] = []
+        for root, _, names in os.walk(directory):
+            directories.append(root)
+            for name in names:
+                path = os.path.join(root, name)
+                signature = _stat(path)
+                if signature is not None:
+                    relative = Path(path).relative_to(self.prompts_dir).as_posix()
+                    files[relative] = signature
+
+        if self._inotify is not None:
+            # Surveiller aussi les dossiers créés depuis le dernier passage
+            for root in directories:
+                self._inotify.watch(root)
+        return files
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
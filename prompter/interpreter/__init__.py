@@ -12,8 +12,10 @@ Key Components
 -------------
 - Interpreter: Main class that combines parsing and evaluation capabilities
 - ActionHandler: Base class for implementing custom action handlers
+- AsyncActionHandler: Base class for handlers running on an asyncio event loop
 - ActionRegistry: Registry system for managing available handlers
 - BlockHelper: Utility class for creating properly formatted blocks
+- ResultCache: Opt-in cache of action results, shared across interpret() calls
 
 Block Format
 -----------
@@ -88,6 +90,11 @@ ActionHandler
     Methods:
         handle(content: str, params: Dict[str, str]) -> str
 
+AsyncActionHandler
+    Base class for asynchronous action handlers, used by `Interpreter.interpret_async`.
+    Methods:
+        async handle_async(content: str, params: Dict[str, str]) -> str
+
 ActionRegistry
     Registry system for managing action handlers.
     Methods:
@@ -114,5 +121,6 @@ Notes
 - Custom block types can be implemented through the handler system
 """
 from .interpreter import Interpreter
-from .evaluator import ActionHandler, ActionRegistry
-from .helper import BlockHelper
\ No newline at end of file
+from .evaluator import ActionHandler, AsyncActionHandler, ActionRegistry
+from .helper import BlockHelper
+from .cache import ResultCache
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Content-addressed cache of action results, shared across `interpret()` calls
+
+The key of a result is a hash of the action type, the content of the block
+and the parameters the handler declares in `cache_params`: the same action
+issued again with another `id` is served from the cache. Only handlers with
+`cacheable = True` (or `deterministic = True`) are cached, and errors never are.
+
+### Example
+```py
+class TranslationHandler(ActionHandler):
+    cacheable = True
+    cache_params = ("lang",)   # `id` et les autres paramètres sont ignorés
+
+    def handle(self, content: str, params: Dict[str, str]) -> str:
+        return translate(content, params["lang"])
+
+cache = ResultCache(max_size=4096, ttl=3600)
+interpreter = Interpreter(cache=cache)
+interpreter.register_handler("translate", TranslationHandler())
+
+interpreter.interpret(text)
+interpreter.clear_context()   # Le cache est conservé
+interpreter.interpret(text)   # Servi par le cache
+
+print(cache.stats())
+```
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, NamedTuple, Optional
+
+
+@dataclass
+class ResultCacheStats:
+    """Snapshot of the counters of a `ResultCache`"""
+    hits: int
+    misses: int
+    evictions: int    # Retirés par la limite de taille (LRU)
+    expirations: int  # Retirés car plus vieux que le TTL
+    entries: int
+    max_size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class _Entry(NamedTuple):
+    result: str
+    expires: Optional[float]  # time.monotonic() d'expiration, None : jamais
+
+
+class ResultCache:
+    """LRU cache of action results, with an optional time to live"""
+
+    DEFAULT_MAX_SIZE = 1024
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size: Maximum number of results kept
+            ttl: Lifetime of a result in seconds (None: no expiration).
+                Results of `deterministic` handlers never expire.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(action_type: str, content: str, params: Dict[str, str],
+            cache_params: Iterable[str] = ()) -> str:
+        """Hash of an action: its type, its content and the parameters in `cache_params`"""
+        relevant = {name: params[name] for name in cache_params if name in params}
+        data = json.dumps([action_type, content, relevant], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires is not None and entry.expires <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.result
+
+    def put(self, key: str, result: str, expires: bool = True) -> None:
+        """Store a result; `expires=False` keeps it until evicted by the LRU"""
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl if expires else None
+        with self._lock:
+            self._entries[key] = _Entry(result, time.monotonic() + ttl if ttl is not None else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> ResultCacheStats:
+        """Return a snapshot of the cache counters"""
+        with self._lock:
+            return ResultCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                entries=len(self._entries),
+                max_size=self.max_size
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"ResultCache(entries={len(self._entries)}, max_size={self.max_size}, ttl={self.ttl})"
@@ -1,9 +1,15 @@
 
-from typing import List, Dict, Callable, Any, Optional
+from typing import List, Dict, Callable, Any, Optional, Collection, Deque, NamedTuple, Set, Tuple, Union
+from collections import deque
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
+import asyncio
+import threading
+import weakref
 
 from .parsing import Block
 from .helper import BlockHelper
+from .cache import ResultCache
 
 
 class BlockError(Exception):
@@ -20,11 +26,14 @@ class ActionContext:
     def __init__(self):
         self.used_ids: set[str] = set()
         self.results: Dict[str, str] = {}  # Stocke les résultats par ID
+        self._lock = threading.Lock()
 
     def register_action_id(self, action_id: str) -> None:
-        if action_id in self.used_ids:
-            raise ActionError(f"Action ID '{action_id}' already exists")
-        self.used_ids.add(action_id)
+        # Vérification et ajout atomiques (actions évaluées en parallèle)
+        with self._lock:
+            if action_id in self.used_ids:
+                raise ActionError(f"Action ID '{action_id}' already exists")
+            self.used_ids.add(action_id)
 
     def has_result(self, action_id: str) -> bool:
         """Vérifie si un résultat existe pour cet ID"""
@@ -56,7 +65,16 @@ class ActionHandler(ABC):
         def handle(self, content: str, params: Dict[str, str]) -> str:
             return f"WARNING: No default handler registered for action with content: {content}"
     ```
+
+    Pour partager les résultats entre les appels (voir `ResultCache`), un
+    handler déclare `cacheable = True` (résultats valables pendant le TTL du
+    cache) ou `deterministic = True` (résultats valables pour toujours), et
+    les paramètres qui changent son résultat dans `cache_params`.
     """
+
+    cacheable: bool = False
+    deterministic: bool = False
+    cache_params: Tuple[str, ...] = ()
     
     @abstractmethod
     def handle(self, content: str, params: Dict[str, str]) -> str:
@@ -89,6 +107,44 @@ class ActionHandler(ABC):
     def __repr__(self):
         return f"<{self.__class__.__name__}()>"
 
+class AsyncActionHandler(ActionHandler):
+    """Handler asynchrone, exécuté sur la boucle d'événements par `interpret_async`
+
+    ### Example:
+    ```py
+    class SearchHandler(AsyncActionHandler):
+        async def handle_async(self, content: str, params: Dict[str, str]) -> str:
+            response = await client.get("/search", params={"q": content})
+            return response.text
+    ```
+    """
+
+    @abstractmethod
+    async def handle_async(self, content: str, params: Dict[str, str]) -> str:
+        """Traite une action avec son contenu et ses paramètres (voir `ActionHandler.handle`)"""
+        pass
+
+    def handle(self, content: str, params: Dict[str, str]) -> str:
+        """Version synchrone, pour `interpret` (hors d'une boucle d'événements)
+
+        Raises:
+            ActionError: Si une boucle d'événements tourne déjà dans ce thread
+                (ex: Jupyter) : utiliser `interpret_async`
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.handle_async(content, params))
+        raise ActionError(
+            f"{self.__class__.__name__} is asynchronous and an event loop is already running: "
+            "use `await interpreter.interpret_async(text)` instead of `interpret`"
+        )
+
+    async def call_async(self, content: str, params: Dict[str, str]) -> str:
+        """Équivalent asynchrone de `__call__`"""
+        self.validate_params(params)
+        return await self.handle_async(content, params)
+
 class ActionRegistry:
     """Registre des actions disponibles
 
@@ -147,19 +203,59 @@ class ActionRegistry:
         return f"ActionRegistry(handlers=[{handlers_str}])"
 
 
+class _PreparedAction(NamedTuple):
+    """Action vérifiée, prête à être exécutée"""
+    action_id: str
+    handler: ActionHandler
+    cache_key: Optional[str]  # None : résultat pas mis en cache
+
 class Evaluator:
-    """Évalue les blocs et exécute les actions"""
-    def __init__(self, registry: ActionRegistry):
+    """Évalue les blocs et exécute les actions
+
+    Avec un `executor`, les handlers des ACTION d'un même texte tournent en
+    parallèle : un thread pool pour des handlers qui attendent des I/O, un
+    process pool pour des handlers qui calculent (handlers picklables).
+    Les vérifications d'ID et de RESULT restent faites dans l'ordre du texte,
+    et les résultats sont retournés dans l'ordre du texte.
+
+    ### Example
+    ```py
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        evaluator = Evaluator(registry, executor=executor, max_parallel=8)
+        results = evaluator.evaluate_blocks(blocks)
+    ```
+    """
+    def __init__(self, registry: ActionRegistry, executor: Optional[Executor] = None,
+                 max_parallel: Optional[int] = None, cache: Optional[ResultCache] = None):
+        """
+        Args:
+            registry: Registre des handlers
+            executor: Executor des handlers (None : un par un, dans le thread appelant)
+            max_parallel: Nombre maximum d'actions en cours à la fois (None : pas de limite)
+            cache: Cache des résultats des handlers `cacheable`, conservé par `clear_context()`
+        """
         self.registry = registry
         self.context = ActionContext()
+        self.cache = cache
+        self.executor = executor
+        self.max_parallel = max_parallel
+        # Limite les actions de evaluate_blocks_async, un par boucle d'événements
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._semaphores_lock = threading.Lock()
+        # Mode streaming : résultats dans l'ordre du texte, prêts ou en cours
+        self._streamed: Deque[Union[str, Tuple[Future, _PreparedAction]]] = deque()
+        self._streamed_ids: Set[str] = set()  # IDs lancés, résultat pas encore stocké
 
     def evaluate_blocks(self, blocks: List[Block]) -> List[Any]:
         """Évalue une liste de blocs
         
         Fait d'abord une passe pour identifier tous les RESULT,
-        puis traite les ACTION en tenant compte des RESULT existants
+        puis traite les ACTION en tenant compte des RESULT existants.
+        Les blocs non fermés (sortie tronquée) sont ignorés.
         """
-        results = []
+        blocks = [block for block in blocks if block.terminated]
         
         # Première passe : traitement des RESULT
         for block in blocks:
@@ -167,21 +263,231 @@ class Evaluator:
                 self._process_result_block(block)
         
         # Deuxième passe : traitement des ACTION
+        if self.executor is not None:
+            return self._evaluate_concurrent([b for b in blocks if b.type == "ACTION"])
+
+        results = []
         for block in blocks:
             if block.type == "ACTION":
-                try:
-                    result = self.evaluate_action(block)
-                except Exception as e:
-                    error_msg = (
-                        f"Error executing action: {str(e)}\n"
-                        "> Make sure to use an available `type` parameter."
-                    )
-                    result = BlockHelper.create_block("ERROR", error_msg)
+                result = self._run_action(block)
                 if result is not None:  # Si l'action n'a pas été ignorée
                     results.append(result)
                 
         return results
 
+    def _evaluate_concurrent(self, actions: List[Block]) -> List[Any]:
+        """Exécute les handlers dans l'executor, en gardant l'ordre du texte"""
+        slots: List[Optional[str]] = [None] * len(actions)
+        running: Dict[Future, Tuple[int, _PreparedAction]] = {}
+        # IDs dont l'action est lancée : leur résultat va exister
+        dispatched: Set[str] = set()
+
+        def finish(future: Future) -> None:
+            index, prepared = running.pop(future)
+            slots[index] = self._store_result(prepared, future)
+
+        for index, block in enumerate(actions):
+            try:
+                prepared = self._prepare_action(block, dispatched)
+            except Exception as e:
+                slots[index] = self._error_block(e)
+                continue
+            if prepared is None:
+                continue
+            cached = self._cached_result(prepared)
+            if cached is not None:
+                slots[index] = cached
+                continue
+            dispatched.add(prepared.action_id)
+
+            if self.max_parallel and len(running) >= self.max_parallel:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future)
+            future = self.executor.submit(prepared.handler, block.content, block.params)
+            running[future] = (index, prepared)
+
+        for future in list(running):
+            finish(future)
+        return [result for result in slots if result is not None]
+
+    async def evaluate_blocks_async(self, blocks: List[Block]) -> List[Any]:
+        """Évalue une liste de blocs sur la boucle d'événements courante
+
+        Comme `evaluate_blocks`, mais les handlers tournent en parallèle :
+        les `AsyncActionHandler` sur la boucle, les handlers synchrones dans
+        un thread (ou dans `executor` s'il est défini). Au plus `max_parallel`
+        actions tournent à la fois, tous appels confondus sur une même boucle.
+        """
+        blocks = [block for block in blocks if block.terminated]
+        for block in blocks:
+            if block.type == "RESULT":
+                self._process_result_block(block)
+
+        semaphore = self._semaphore()
+        slots: List[Any] = []
+        dispatched: Set[str] = set()
+        for block in blocks:
+            if block.type != "ACTION":
+                continue
+            try:
+                prepared = self._prepare_action(block, dispatched)
+            except Exception as e:
+                slots.append(self._error_block(e))
+                continue
+            if prepared is None:
+                continue
+            cached = self._cached_result(prepared)
+            if cached is not None:
+                slots.append(cached)
+                continue
+            dispatched.add(prepared.action_id)
+            slots.append(asyncio.ensure_future(self._run_async(prepared, block, semaphore)))
+
+        results = []
+        try:
+            for slot in slots:
+                result = await slot if isinstance(slot, asyncio.Future) else slot
+                if result is not None:
+                    results.append(result)
+        finally:
+            # Annulation de l'appel : ne pas laisser tourner les autres actions
+            for slot in slots:
+                if isinstance(slot, asyncio.Future):
+                    slot.cancel()
+        return results
+
+    def _semaphore(self) -> Optional[asyncio.Semaphore]:
+        """Limite `max_parallel` de la boucle en cours (un sémaphore est lié à sa boucle)"""
+        if not self.max_parallel:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._semaphores_lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_parallel)
+        return semaphore
+
+    async def _run_async(self, prepared: _PreparedAction, block: Block,
+                         semaphore: Optional[asyncio.Semaphore]) -> str:
+        """Exécute un handler en respectant la limite d'actions, puis stocke son résultat"""
+        if semaphore is not None:
+            async with semaphore:
+                result = await self._call_handler(prepared, block)
+        else:
+            result = await self._call_handler(prepared, block)
+        self.context.store_result(prepared.action_id, result)
+        return BlockHelper.create_result(result, prepared.action_id)
+
+    async def _call_handler(self, prepared: _PreparedAction, block: Block) -> str:
+        handler = prepared.handler
+        try:
+            if isinstance(handler, AsyncActionHandler):
+                result = await handler.call_async(block.content, block.params)
+            elif self.executor is not None:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.executor, handler, block.content, block.params)
+            else:
+                result = await asyncio.to_thread(handler, block.content, block.params)
+        except Exception as e:
+            return f"Error executing action: {str(e)}"
+        self._remember(prepared, result)
+        return result
+
+    def evaluate_block(self, block: Block) -> Optional[str]:
+        """Évalue un seul bloc, dans l'ordre d'arrivée (mode streaming)
+
+        Contrairement à `evaluate_blocks`, un RESULT n'ignore que les ACTION
+        qui arrivent après lui.
+        """
+        if not block.terminated:
+            # Bloc tronqué : son contenu n'est pas complet
+            return None
+        if block.type == "RESULT":
+            self._process_result_block(block)
+        elif block.type == "ACTION":
+            return self._run_action(block)
+        return None
+
+    def submit_block(self, block: Block) -> None:
+        """Évalue un bloc en mode streaming, son résultat est lu par `ready_results`
+
+        Sans executor, l'action tourne tout de suite (voir `evaluate_block`).
+        Avec un executor, elle y est lancée et la lecture du texte continue.
+        """
+        if self.executor is None or not block.terminated or block.type != "ACTION":
+            result = self.evaluate_block(block)
+            if result is not None:
+                self._streamed.append(result)
+            return
+
+        try:
+            prepared = self._prepare_action(block, self._streamed_ids)
+        except Exception as e:
+            self._streamed.append(self._error_block(e))
+            return
+        if prepared is None:
+            return
+        cached = self._cached_result(prepared)
+        if cached is not None:
+            self._streamed.append(cached)
+            return
+
+        if self.max_parallel:
+            running = [entry[0] for entry in self._streamed
+                       if not isinstance(entry, str) and not entry[0].done()]
+            if len(running) >= self.max_parallel:
+                wait(running, return_when=FIRST_COMPLETED)
+        self._streamed_ids.add(prepared.action_id)
+        future = self.executor.submit(prepared.handler, block.content, block.params)
+        self._streamed.append((future, prepared))
+
+    def ready_results(self, wait_all: bool = False) -> List[str]:
+        """Retourne les résultats des blocs de `submit_block` déjà prêts, dans l'ordre du texte
+
+        Un résultat attend ceux des actions précédentes. Avec `wait_all`,
+        attend toutes les actions lancées.
+        """
+        results = []
+        while self._streamed:
+            entry = self._streamed[0]
+            if not isinstance(entry, str):
+                future, prepared = entry
+                if not (wait_all or future.done()):
+                    break
+                entry = self._store_result(prepared, future)
+                self._streamed_ids.discard(prepared.action_id)
+            results.append(entry)
+            self._streamed.popleft()
+        return results
+
+    def reset_stream(self) -> None:
+        """Oublie les actions du mode streaming pas encore retournées (ex: flux interrompu)
+
+        Les actions pas encore commencées sont annulées, les résultats des
+        autres sont ignorés.
+        """
+        for entry in self._streamed:
+            if not isinstance(entry, str):
+                entry[0].cancel()
+        self._streamed.clear()
+        self._streamed_ids.clear()
+
+    def _run_action(self, block: Block) -> Optional[str]:
+        """Évalue un bloc d'action, les erreurs devenant un bloc ERROR"""
+        try:
+            return self.evaluate_action(block)
+        except Exception as e:
+            return self._error_block(e)
+
+    @staticmethod
+    def _error_block(error: Exception) -> str:
+        error_msg = (
+            f"Error executing action: {str(error)}\n"
+            "> Make sure to use an available `type` parameter."
+        )
+        return BlockHelper.create_block("ERROR", error_msg)
+
     def _process_result_block(self, block: Block) -> None:
         """Traite un bloc RESULT en stockant son contenu"""
         if "id" not in block.params:
@@ -190,28 +496,73 @@ class Evaluator:
         action_id = block.params["id"]
         self.context.store_result(action_id, block.content)
 
-    def evaluate_action(self, block: Block) -> Optional[str]:
-        """Évalue un bloc d'action"""
+    def _prepare_action(self, block: Block,
+                        pending: Collection[str] = ()) -> Optional[_PreparedAction]:
+        """Vérifie un bloc d'action et trouve son handler, None si l'action est ignorée
+
+        `pending` : IDs des actions lancées dont le résultat n'est pas encore stocké
+        """
         if "id" not in block.params:
             raise ActionError("Action block must have an 'id' parameter")
 
         action_id = block.params["id"]
         
         # Si un résultat existe déjà pour cet ID, on ignore l'action
-        if self.context.has_result(action_id):
+        if self.context.has_result(action_id) or action_id in pending:
             return None
 
         # Vérifie si l'ID est déjà utilisé
         self.context.register_action_id(action_id)
         
-        # Récupère et exécute le handler approprié
+        # Récupère le handler approprié
         action_type = block.params.get("type", "default")
         handler = self.registry.get_handler(action_type)
+
+        cache_key = None
+        if self.cache is not None and (handler.cacheable or handler.deterministic):
+            cache_key = ResultCache.key(action_type, block.content, block.params, handler.cache_params)
+        return _PreparedAction(action_id, handler, cache_key)
+
+    def _cached_result(self, prepared: _PreparedAction) -> Optional[str]:
+        """Bloc de résultat servi par le cache, ou None si le handler doit tourner"""
+        if prepared.cache_key is None:
+            return None
+        result = self.cache.get(prepared.cache_key)
+        if result is None:
+            return None
+        self.context.store_result(prepared.action_id, result)
+        return BlockHelper.create_result(result, prepared.action_id)
+
+    def _remember(self, prepared: _PreparedAction, result: str) -> None:
+        """Met en cache le résultat d'un handler (jamais une erreur)"""
+        if prepared.cache_key is not None:
+            self.cache.put(prepared.cache_key, result, expires=not prepared.handler.deterministic)
+
+    def _store_result(self, prepared: _PreparedAction, future: Future) -> str:
+        """Stocke le résultat d'une action lancée dans l'executor et crée son bloc"""
+        try:
+            result = future.result()
+            self._remember(prepared, result)
+        except Exception as e:
+            result = f"Error executing action: {str(e)}"
+        self.context.store_result(prepared.action_id, result)
+        return BlockHelper.create_result(result, prepared.action_id)
+
+    def evaluate_action(self, block: Block) -> Optional[str]:
+        """Évalue un bloc d'action"""
+        prepared = self._prepare_action(block)
+        if prepared is None:
+            return None
+        cached = self._cached_result(prepared)
+        if cached is not None:
+            return cached
+        action_id, handler = prepared.action_id, prepared.handler
         
         # Exécute l'action et crée le bloc de résultat
 
         try:
             result = handler(block.content, block.params)
+            self._remember(prepared, result)
             self.context.store_result(action_id, result)
         except Exception as e:
             error_msg = f"Error executing action: {str(e)}"
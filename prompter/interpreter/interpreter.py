@@ -1,6 +1,8 @@
-from typing import List, Dict, Any, Optional, Callable
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator
 from .parsing import Parser
 from .evaluator import Evaluator, ActionRegistry, ActionHandler
+from .cache import ResultCache
 
 
 class DefaultHandler(ActionHandler):
@@ -53,11 +55,34 @@ class Interpreter:
                 ##RESULT_END
             ]
 
+    #### Streaming (texte en cours de génération) :
+            >>> for chunk in llm_stream:
+            ...     for result in interpreter.feed(chunk):
+            ...         send(result)  # L'action tourne pendant la génération
+            >>> for result in interpreter.close():
+            ...     send(result)
+
+    #### Actions en parallèle (handlers qui attendent des I/O) :
+            >>> executor = ThreadPoolExecutor(max_workers=8)
+            >>> interpreter = Interpreter(executor=executor, max_parallel=8)
+
+    #### Handlers asynchrones :
+            >>> class SearchHandler(AsyncActionHandler):
+            ...     async def handle_async(self, content: str, params: Dict[str, str]) -> str:
+            ...         return await client.search(content)
+            >>> interpreter.register_handler("search", SearchHandler())
+            >>> results = await interpreter.interpret_async(text)
+
+    #### Cache des résultats (handlers avec `cacheable = True`) :
+            >>> interpreter = Interpreter(cache=ResultCache(max_size=4096, ttl=3600))
+
     #### Réinitialisation :
-            >>> interpreter.clear_context()  # Efface les IDs utilisés
+            >>> interpreter.clear_context()  # Efface les IDs utilisés (pas le cache)
     """
     
-    def __init__(self, registry: Optional[ActionRegistry] = None):
+    def __init__(self, registry: Optional[ActionRegistry] = None,
+                 executor: Optional[Executor] = None, max_parallel: Optional[int] = None,
+                 cache: Optional[ResultCache] = None):
         self.parser = Parser()
         self.registry = registry or ActionRegistry()
         
@@ -65,7 +90,9 @@ class Interpreter:
         if not registry:
             self.registry.register("default", DefaultHandler())
             
-        self.evaluator = Evaluator(self.registry)
+        self.evaluator = Evaluator(
+            self.registry, executor=executor, max_parallel=max_parallel, cache=cache
+        )
     
     def register_handler(self, action_type: str, handler: ActionHandler) -> None:
         """Enregistre un nouveau handler dans le registre"""
@@ -76,9 +103,56 @@ class Interpreter:
         blocks = self.parser.parse(text)
         return self.evaluator.evaluate_blocks(blocks)
     
+    async def interpret_async(self, text: str) -> List[Any]:
+        """Interprète un texte complet sur la boucle d'événements courante
+
+        Les `AsyncActionHandler` tournent en parallèle sur la boucle, les
+        handlers synchrones dans un thread ; `max_parallel` limite le nombre
+        d'actions en cours pour tout l'interpréteur.
+        """
+        blocks = self.parser.parse(text)
+        return await self.evaluator.evaluate_blocks_async(blocks)
+    
+    def feed(self, chunk: str) -> List[Any]:
+        """Interprète un morceau de texte en cours de génération
+
+        Chaque ACTION est exécutée dès que son marqueur END est reçu, sans
+        attendre la fin du texte. Un RESULT n'ignore que les ACTION reçues
+        après lui. Avec un `executor`, les actions y sont lancées et leurs
+        résultats retournés dès qu'ils sont prêts, dans l'ordre du texte.
+        """
+        for block in self.parser.feed(chunk):
+            self.evaluator.submit_block(block)
+        return self.evaluator.ready_results()
+    
+    def close(self) -> List[Any]:
+        """Termine le texte reçu par `feed`, interprète les derniers blocs et attend les actions en cours"""
+        for block in self.parser.close():
+            self.evaluator.submit_block(block)
+        return self.evaluator.ready_results(wait_all=True)
+    
+    def interpret_stream(self, chunks: Iterable[str]) -> Iterator[Any]:
+        """Interprète un flux de morceaux de texte, en produisant chaque résultat dès que possible
+
+        Si le flux s'interrompt (exception, générateur abandonné), le texte
+        reçu est oublié : le flux suivant repart d'un parser vide.
+        """
+        try:
+            for chunk in chunks:
+                yield from self.feed(chunk)
+            yield from self.close()
+        finally:
+            self.reset_stream()
+    
+    def reset_stream(self) -> None:
+        """Oublie le texte reçu par `feed` et les actions en attente (ex: flux interrompu)"""
+        self.parser.reset()
+        self.evaluator.reset_stream()
+    
     def clear_context(self) -> None:
-        """Réinitialise le contexte d'exécution"""
+        """Réinitialise le contexte d'exécution et le texte en cours de `feed`"""
         self.evaluator.context.clear()
+        self.reset_stream()
     
     def __repr__(self) -> str:
         return f"Interpreter(registry={self.registry})"
\ No newline at end of file
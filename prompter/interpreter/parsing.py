@@ -1,5 +1,5 @@
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
 @dataclass
@@ -9,14 +9,51 @@ class Block:
     params: Dict[str, str]
     start_pos: int
     end_pos: int
+    terminated: bool = True  # False : ligne START sans END (ex: sortie tronquée)
+
+# Types de lignes de marqueur
+_START = "START"
+_END = "END"
+
+_MARKER = re.compile(r'##(\w+)')
+_PARAM = re.compile(r'\w+=\S+')
 
 class Parser:
+    """Découpe un texte en blocs
+
+    `parse` travaille sur un texte complet. Pour un texte en cours de
+    génération (ex: flux de tokens d'un LLM), `feed` reçoit les morceaux au
+    fil de l'eau et renvoie chaque bloc dès que son marqueur END est arrivé,
+    avec le bloc TEXT qui le précède ; `close` renvoie la fin du texte.
+    Les blocs obtenus sont les mêmes que ceux de `parse` sur le texte entier.
+
+    Le texte est lu en une seule passe sur les lignes (temps linéaire, même
+    avec des marqueurs non fermés). Une ligne START sans END donne un bloc
+    `terminated=False`, qui s'étend jusqu'à la ligne START suivante.
+
+    ### Example
+    ```py
+    parser = Parser()
+    for chunk in stream:
+        for block in parser.feed(chunk):
+            handle(block)
+    for block in parser.close():
+        handle(block)
+    ```
+    """
     def __init__(self):
-        # Regex modifiée pour ne capturer que les vrais paramètres
-        self.block_pattern = re.compile(
-            r'^##(\w+)_START(?:\s+((?:\w+=\S+\s*)+))?\s*$(.*?)^##\1_END$',
-            re.MULTILINE | re.DOTALL
-        )
+        self.reset()
+
+    def reset(self) -> None:
+        """Oublie le texte reçu par `feed`"""
+        self._parts: List[str] = []   # Lignes complètes pas encore découpées
+        self._line: List[str] = []    # Morceaux de la ligne en cours (sans fin de ligne)
+        self._offset = 0              # Position de self._parts[0] dans le texte
+        self._length = 0              # Position de fin des lignes complètes reçues
+        # Marqueurs des lignes pas encore découpées, en positions absolues :
+        # chaque ligne n'est examinée qu'une fois
+        self._markers: List[Tuple[int, int, str, str, str]] = []
+        self._scanned = 0             # Marqueurs déjà cherchés comme END du START ouvert
         
     def _parse_params(self, params_str: str) -> Dict[str, str]:
         """Parse les paramètres d'un bloc (ex: id=img001)"""
@@ -30,52 +67,227 @@ class Parser:
                 params[key] = value
         return params
 
-    def parse(self, text: str) -> List[Block]:
-        """Parse le texte et retourne une liste de blocs"""
+    def _text_block(self, text: str, start: int, end: int, offset: int) -> Optional[Block]:
+        """Bloc TEXT pour text[start:end], ou None s'il est vide"""
+        text_content = text[start:end].strip()
+        if not text_content:
+            return None
+        return Block(
+            type="TEXT",
+            content=text_content,
+            params={},
+            start_pos=offset + start,
+            end_pos=offset + end
+        )
+
+    def _marker(self, text: str, start: int, end: int) -> Optional[Tuple[str, str, str]]:
+        """
+        Reconnaît une ligne de marqueur text[start:end] (sans fin de ligne)
+
+        Returns:
+            Tuple: (START ou END, type du bloc, paramètres), ou None
+        """
+        match = _MARKER.match(text, start, end)
+        if match is None:
+            return None
+        word = match.group(1)
+        rest = text[match.end():end]
+
+        if word.endswith("_END") and len(word) > 4 and not rest:
+            return _END, word[:-4], ""
+
+        if word.endswith("_START") and len(word) > 6:
+            # Que des paramètres (ex: id=img001) séparés par des espaces
+            if not rest.strip():
+                return _START, word[:-6], ""
+            if rest[0].isspace() and all(_PARAM.fullmatch(p) for p in rest.split()):
+                return _START, word[:-6], rest
+        return None
+
+    def _scan(self, text: str, offset: int,
+              markers: List[Tuple[int, int, str, str, str]]) -> None:
+        """
+        Ajoute à `markers` les lignes de marqueur de `text`, qui commence à la
+        position `offset` : (début, fin, START/END, type, paramètres)
+        """
+        pos = 0
+        while True:
+            end = text.find("\n", pos)
+            if end < 0:
+                end = len(text)
+            if text.startswith("##", pos):
+                marker = self._marker(text, pos, end)
+                if marker is not None:
+                    markers.append((offset + pos, offset + end) + marker)
+            if end == len(text):
+                break
+            pos = end + 1
+
+    def _split(self, text: str, offset: int, complete: bool) -> Tuple[List[Block], int]:
+        """
+        Découpe les blocs de `text`, qui commence à la position `offset`
+
+        Si le texte n'est pas complet, on s'arrête à la première ligne START
+        encore ouverte : son END peut encore arriver.
+
+        Returns:
+            Tuple: Les blocs trouvés et la position de fin du dernier bloc
+        """
+        markers: List[Tuple[int, int, str, str, str]] = []
+        self._scan(text, 0, markers)
+
+        # Pour chaque START, le premier END du même type qui le suit
+        closing: List[Optional[int]] = [None] * len(markers)
+        next_end: Dict[str, int] = {}
+        for i in range(len(markers) - 1, -1, -1):
+            kind, block_type = markers[i][2], markers[i][3]
+            if kind == _END:
+                next_end[block_type] = i
+            else:
+                closing[i] = next_end.get(block_type)
+
         blocks = []
         last_end = 0
+        i = 0
+        while i < len(markers):
+            start, header_end, kind, block_type, params_str = markers[i]
+            if kind == _END:
+                i += 1
+                continue
         
-        # Trouver tous les blocs
-        for match in self.block_pattern.finditer(text):
-            start = match.start()
+            j = closing[i]
+            if j is not None:
+                content_end, end = markers[j][0], markers[j][1]
+                following = j + 1
+            elif complete:
+                # Bloc non fermé : jusqu'à la ligne START suivante
+                following = i + 1
+                while following < len(markers) and markers[following][2] != _START:
+                    following += 1
+                content_end = end = markers[following][0] if following < len(markers) else len(text)
+            else:
+                break
             
             # Ajouter le texte qui précède comme bloc TEXT
             if start > last_end:
-                text_content = text[last_end:start].strip()
-                if text_content:
-                    blocks.append(Block(
-                        type="TEXT",
-                        content=text_content,
-                        params={},
-                        start_pos=last_end,
-                        end_pos=start
-                    ))
+                text_block = self._text_block(text, last_end, start, offset)
+                if text_block is not None:
+                    blocks.append(text_block)
             
-            # Parser le bloc trouvé
-            block_type = match.group(1)
-            params_str = match.group(2) or ""
-            content = match.group(3).strip()
-
             blocks.append(Block(
                 type=block_type,
-                content=content,
+                content=text[header_end:content_end].strip(),
                 params=self._parse_params(params_str),
-                start_pos=start,
-                end_pos=match.end()
+                start_pos=offset + start,
+                end_pos=offset + end,
+                terminated=j is not None
             ))
             
-            last_end = match.end()
+            last_end = end
+            i = following
+        
+        return blocks, last_end
+
+    def parse(self, text: str) -> List[Block]:
+        """Parse le texte et retourne une liste de blocs"""
+        blocks, last_end = self._split(text, 0, complete=True)
         
         # Ajouter le texte restant comme bloc TEXT
         if last_end < len(text):
-            remaining_text = text[last_end:].strip()
-            if remaining_text:
-                blocks.append(Block(
-                    type="TEXT",
-                    content=remaining_text,
-                    params={},
-                    start_pos=last_end,
-                    end_pos=len(text)
-                ))
+            text_block = self._text_block(text, last_end, len(text), 0)
+            if text_block is not None:
+                blocks.append(text_block)
         
-        return blocks
\ No newline at end of file
+        return blocks
+
+    def feed(self, chunk: str) -> List[Block]:
+        """
+        Ajoute un morceau de texte et retourne les blocs terminés
+
+        Un bloc est terminé quand la ligne de son marqueur END est complète ;
+        le bloc TEXT qui le précède est retourné avec lui.
+        """
+        newline = chunk.rfind("\n")
+        if newline < 0:
+            self._line.append(chunk)
+            return []
+
+        # La ligne en cours n'est assemblée qu'une fois, à sa fin
+        self._line.append(chunk[:newline + 1])
+        lines = "".join(self._line)
+        self._line = [chunk[newline + 1:]]
+        self._parts.append(lines)
+
+        # Seules les nouvelles lignes sont examinées
+        count = len(self._markers)
+        self._scan(lines, self._length, self._markers)
+        self._length += len(lines)
+        # Pas de nouveau marqueur END : rien ne peut se terminer
+        if not any(m[2] == _END for m in self._markers[count:]):
+            return []
+        return self._complete()
+
+    def _complete(self) -> List[Block]:
+        """
+        Retourne les blocs terminés parmi les marqueurs reçus par `feed`
+
+        Le START ouvert en tête de `self._markers` n'est comparé qu'aux
+        marqueurs arrivés depuis le dernier appel.
+        """
+        markers = self._markers
+        blocks: List[Block] = []
+        text = None
+        last_end = self._offset
+        head = 0
+        scanned = self._scanned
+        while head < len(markers):
+            start, header_end, kind, block_type, params_str = markers[head]
+            if kind == _END:
+                head += 1
+                continue
+
+            # Premier END du même type après ce START
+            j = max(scanned, head + 1)
+            while j < len(markers) and not (markers[j][2] == _END and markers[j][3] == block_type):
+                j += 1
+            if j == len(markers):
+                break
+
+            if text is None:
+                text = "".join(self._parts)
+            offset = self._offset
+            if start > last_end:
+                text_block = self._text_block(text, last_end - offset, start - offset, offset)
+                if text_block is not None:
+                    blocks.append(text_block)
+
+            content_end, end = markers[j][0], markers[j][1]
+            blocks.append(Block(
+                type=block_type,
+                content=text[header_end - offset:content_end - offset].strip(),
+                params=self._parse_params(params_str),
+                start_pos=start,
+                end_pos=end
+            ))
+            last_end = end
+            head = j + 1
+            scanned = 0
+
+        # Garder le START ouvert et les marqueurs qui le suivent
+        del markers[:head]
+        self._scanned = len(markers)
+        if text is not None:
+            self._parts = [text[last_end - self._offset:]]
+            self._offset = last_end
+        return blocks
+
+    def close(self) -> List[Block]:
+        """Termine le texte reçu par `feed` et retourne les blocs restants"""
+        text = "".join(self._parts) + "".join(self._line)
+        blocks, last_end = self._split(text, self._offset, complete=True)
+        if last_end < len(text):
+            text_block = self._text_block(text, last_end, len(text), self._offset)
+            if text_block is not None:
+                blocks.append(text_block)
+        self.reset()
+        return blocks